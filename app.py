@@ -1,44 +1,141 @@
-from flask import Flask, render_template
-from db_operations import get_giveaway_from_db
+from flask import Flask, render_template, request, make_response, jsonify, send_file
+from db_operations import get_giveaway_summary, get_giveaway_version, get_entrants_page
+from render_cache import RenderCache
+from database import db
+from static_export import summary_context, page_path, ENTRANTS_PAGE_SIZE
+from logging_setup import setup_logging
+import metrics
+import ipaddress
+import hmac
 import os
 
 app = Flask(__name__)
+render_cache = RenderCache()
+
+# Ended giveaways only change on reroll, which bumps their version and ETag
+ENDED_MAX_AGE = int(os.getenv('SUMMARY_CACHE_MAX_AGE', '86400'))
+
+ENTRANTS_PAGE_MAX = 500
+
+# Scrapers must send this as a bearer token; without it only clients that
+# connect directly from loopback or a private network may read /metrics
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+# Set by gunicorn.conf.py: where each worker writes its metrics snapshot
+METRICS_DIR = os.getenv('WEB_METRICS_DIR')
+
+def render_summary(giveaway: dict, message_id: str) -> str:
+    """Render the summary page of a giveaway loaded by get_giveaway_summary."""
+    return render_template('giveaway.html', **summary_context(giveaway, message_id))
+
+def send_exported(message_id: str):
+    """
+    Serve a pre-rendered page written by static_export, if there is one.
+
+    The file is handed to the WSGI server's file wrapper (sendfile under
+    gunicorn) instead of being read into Python. Returns None when the
+    giveaway has not been exported.
+    """
+    if not message_id.isdigit() or not os.path.exists(page_path(message_id)):
+        return None
+
+    path = page_path(message_id)
+    compressed = page_path(message_id, compressed=True)
+    gzipped = 'gzip' in request.accept_encodings and os.path.exists(compressed)
+    response = send_file(compressed if gzipped else path, mimetype='text/html',
+                         conditional=True, etag=True, max_age=ENDED_MAX_AGE)
+    if gzipped:
+        response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    return response
+
+def _cacheable(response, status: str):
+    """Apply Cache-Control for a giveaway in the given status."""
+    if status == 'ended':
+        response.cache_control.public = True
+        response.cache_control.max_age = ENDED_MAX_AGE
+    else:
+        response.cache_control.no_cache = True
+    return response
 
 @app.route('/<message_id>')
 def show_giveaway(message_id):
-    giveaway = get_giveaway_from_db(message_id)
-    
-    if not giveaway:
+    exported = send_exported(message_id)
+    if exported is not None:
+        return exported
+
+    current = get_giveaway_version(message_id)
+
+    if not current:
         return "Giveaway not found", 404
-    
-    seconds = giveaway['Time']
-    if seconds < 60:
-        duration = f"{seconds} seconds"
-    elif seconds < 3600:
-        duration = f"{seconds//60} minutes"
-    elif seconds < 86400:
-        duration = f"{seconds//3600} hours"
-    else:
-        duration = f"{seconds//86400} days"
-    
-    data = {
-        'title': giveaway['Title'],
-        'host': giveaway['Hoster'],
-        'duration': duration,
-        'description': giveaway['Description'],
-        'winner_count': len(giveaway['Winners']),
-        'entries': len(giveaway['Entrants']),
-        'participants': len(giveaway['Entrants']),
-        'winners': giveaway['Winners']
-    }
-    
-    return render_template('giveaway.html', 
-                         giveaway=data,
-                         winners=giveaway['Winners'],
-                         entrants=giveaway['Entrants'])
+
+    version, status = current
+    page = render_cache.get(message_id, version)
+    if page is None:
+        giveaway = get_giveaway_summary(message_id, ENTRANTS_PAGE_SIZE)
+        if not giveaway:
+            return "Giveaway not found", 404
+        page = render_cache.put(message_id, version, render_summary(giveaway, message_id).encode())
+
+    response = make_response(page.body)
+    response.set_etag(page.etag)
+    return _cacheable(response, status).make_conditional(request)
+
+@app.route('/api/<message_id>/entrants')
+def list_entrants(message_id):
+    """Return one cursor-paginated page of entrants as JSON."""
+    current = get_giveaway_version(message_id)
+
+    if not current:
+        return jsonify({"error": "Giveaway not found"}), 404
+
+    cursor = request.args.get('cursor', 0, type=int)
+    limit = min(max(request.args.get('limit', ENTRANTS_PAGE_SIZE, type=int), 1), ENTRANTS_PAGE_MAX)
+    entrants, next_cursor = get_entrants_page(message_id, cursor, limit)
+
+    response = jsonify({"entrants": entrants, "next_cursor": next_cursor})
+    response.set_etag(f"{message_id}-{current[0]}-{cursor}-{limit}")
+    return _cacheable(response, current[1]).make_conditional(request)
+
+def metrics_allowed() -> bool:
+    """Whether the client may read /metrics (see METRICS_TOKEN)."""
+    if METRICS_TOKEN:
+        return hmac.compare_digest(request.headers.get('Authorization', ''), f"Bearer {METRICS_TOKEN}")
+    # Behind a reverse proxy every client appears to come from the proxy's
+    # private address, so anything it relayed counts as public
+    if 'X-Forwarded-For' in request.headers:
+        return False
+    try:
+        address = ipaddress.ip_address(request.remote_addr or '')
+    except ValueError:
+        return False
+    return address.is_loopback or address.is_private
+
+@app.route('/metrics')
+def metrics_page():
+    """
+    Prometheus metrics of the web app (DB query timings).
+
+    Under gunicorn the snapshots of all workers are summed, so any worker
+    can answer the scrape.
+    """
+    if not metrics_allowed():
+        return "Forbidden", 403
+    body = metrics.render_snapshots(METRICS_DIR) if METRICS_DIR else metrics.render()
+    response = make_response(body)
+    response.headers['Content-Type'] = 'text/plain; version=0.0.4; charset=utf-8'
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+def warm_worker(readers: int = 1) -> None:
+    """Compile templates and open DB connections before a worker takes traffic."""
+    app.jinja_env.get_template('giveaway.html')
+    db.warm(readers)
 
 if __name__ == '__main__':
     if not os.path.exists('templates'):
         os.makedirs('templates')
-    
-    app.run(host='0.0.0.0', debug=True)
+
+    setup_logging(os.getenv('WEB_LOG_FILE', 'web.log'))
+    # Development server only; production runs under gunicorn (see gunicorn.conf.py)
+    app.run(host='0.0.0.0', port=int(os.getenv('PORT', '5000')), debug=os.getenv('FLASK_DEBUG') == '1')
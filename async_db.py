@@ -0,0 +1,78 @@
+import asyncio
+import logging
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable
+
+import db_operations
+import static_export
+
+# All bot-side database work runs on this thread, never on the event loop.
+# A single thread matches the single writer connection and keeps journal
+# flushes, saves and reads in submission order.
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='giveaway-db')
+
+def _run_in_db_thread(func: Callable[..., Any]) -> Callable[..., Awaitable[Any]]:
+    """Wrap a blocking db_operations function as a coroutine function."""
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_executor, functools.partial(func, *args, **kwargs))
+    return wrapper
+
+init_db = _run_in_db_thread(db_operations.init_db)
+migrate_entries_batch = _run_in_db_thread(db_operations.migrate_entries_batch)
+save_giveaway_to_db = _run_in_db_thread(db_operations.save_giveaway_to_db)
+finalize_giveaway = _run_in_db_thread(db_operations.finalize_giveaway)
+apply_entry_events = _run_in_db_thread(db_operations.apply_entry_events)
+create_active_giveaway = _run_in_db_thread(db_operations.create_active_giveaway)
+delete_giveaway = _run_in_db_thread(db_operations.delete_giveaway)
+get_giveaway_header = _run_in_db_thread(db_operations.get_giveaway_header)
+reroll_winners = _run_in_db_thread(db_operations.reroll_winners)
+get_active_giveaways = _run_in_db_thread(db_operations.get_active_giveaways)
+get_giveaway_from_db = _run_in_db_thread(db_operations.get_giveaway_from_db)
+get_all_giveaways_from_db = _run_in_db_thread(db_operations.get_all_giveaways_from_db)
+count_entries = _run_in_db_thread(db_operations.count_entries)
+has_entered = _run_in_db_thread(db_operations.has_entered)
+get_user_giveaways = _run_in_db_thread(db_operations.get_user_giveaways)
+get_entrants_page = _run_in_db_thread(db_operations.get_entrants_page)
+
+async def migrate_entries(batch_size: int = db_operations.MIGRATION_BATCH_SIZE) -> int:
+    """
+    Backfill legacy entrant lists one batch per DB thread job.
+
+    Journal flushes, saves and rerolls submitted meanwhile run between
+    batches instead of waiting for the whole backfill.
+
+    Returns:
+        int: Number of giveaways migrated
+    """
+    migrated = 0
+    while True:
+        batch = await migrate_entries_batch(batch_size)
+        migrated += batch
+        if batch < batch_size:
+            break
+    if migrated:
+        logging.info(f"Migrated entries of {migrated} giveaways")
+    return migrated
+
+# Exports render and gzip whole pages, so they run on their own thread and
+# read through the reader pool instead of holding up the DB thread. One
+# thread keeps exports of the same giveaway in submission order.
+_export_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='giveaway-export')
+
+def _export(message_id: str) -> None:
+    try:
+        static_export.export_giveaway(message_id)
+    except Exception as e:
+        logging.error(f"Error exporting giveaway {message_id}: {e}")
+
+def schedule_export(message_id: str) -> None:
+    """
+    Re-render a giveaway's static page in the background.
+
+    Call it after the write that ended or rerolled the giveaway has been
+    awaited; the summary page is served dynamically until the export lands.
+    """
+    _export_executor.submit(_export, message_id)
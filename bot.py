@@ -1,58 +1,178 @@
 import os
+import time
+import json
+import signal
 import asyncio
+import hashlib
 import logging
 from dotenv import load_dotenv
 
+import aiohttp
 import discord
 from discord.ext import commands
 from discord import app_commands
 
-from db_operations import init_db
+from async_db import init_db, migrate_entries
 from commands import create_giveaway, reroll, reroll_giveaway
-from views import GiveawayView
-
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('bot.log'),
-        logging.StreamHandler()
-    ]
-)
+from views import GiveawayView, LeaveGiveawayButton, restore_active_giveaways
+from entry_journal import journal
+from scheduler import scheduler
+from cluster import parse_shard_ids
+from logging_setup import setup_logging
+import metrics
+
+# Cold start reference for the startup timings logged below
+STARTED_AT = time.perf_counter()
 
 load_dotenv()
 
 TOKEN = os.getenv('DISCORD_TOKEN')
 
-intents = discord.Intents.all()
-intents.presences = True
-intents.members = True
-intents.message_content = True
+# Interactions are delivered whatever the intents, and entrant profiles come
+# from their payloads (see profile_cache), so by default the bot only asks
+# for guild and channel data and keeps no member or message cache.
+LEAN_INTENTS = os.getenv('LEAN_INTENTS', '1') == '1'
+
+if LEAN_INTENTS:
+    intents = discord.Intents.none()
+    intents.guilds = True
+    cache_options = {
+        'member_cache_flags': discord.MemberCacheFlags.none(),
+        'chunk_guilds_at_startup': False,
+        'max_messages': None
+    }
+else:
+    intents = discord.Intents.all()
+    intents.presences = True
+    intents.members = True
+    intents.message_content = True
+    cache_options = {}
 
-bot = commands.Bot(
+# Set by cluster.py when this process runs one shard range of a cluster;
+# left unset, the bot connects every shard it is recommended
+SHARD_COUNT = int(os.getenv('SHARD_COUNT', '0')) or None
+SHARD_IDS = parse_shard_ids(os.getenv('SHARD_IDS'))
+CLUSTER_ID = int(os.getenv('CLUSTER_ID', '0'))
+
+# Side port serving Prometheus metrics (cluster processes use METRICS_PORT + CLUSTER_ID)
+METRICS_PORT = int(os.getenv('METRICS_PORT', '0'))
+
+# Each cluster process rotates its own file
+setup_logging(f'bot-{CLUSTER_ID}.log' if SHARD_IDS else 'bot.log')
+
+bot = commands.AutoShardedBot(
     command_prefix='!',
     intents=intents,
-    help_command=None 
+    help_command=None,
+    shard_count=SHARD_COUNT,
+    shard_ids=SHARD_IDS,
+    # Sent with IDENTIFY, so reconnects need no extra presence update
+    status=discord.Status.idle,
+    activity=discord.Game("/giveaway"),
+    http_trace=metrics.rest_trace(),
+    # Rate limits longer than this raise discord.RateLimited instead of
+    # sleeping, so the embed updater and DM dispatcher can back off
+    max_ratelimit_timeout=float(os.getenv('MAX_RATELIMIT_TIMEOUT', '30')),
+    **cache_options
 )
+bot.entry_migration = None
+bot.shutdown_task = None
+bot.first_interaction = False
+bot.loop_lag_monitor = None
+bot.metrics_server = None
 
-@bot.event
-async def on_ready():
-    """Handler for when the bot is ready and connected to Discord."""
-    logging.info(f"Logged in as {bot.user}")
-    logging.info(f"Serving {len(bot.guilds)} guilds")
+# Hash of the last command tree synced to Discord
+COMMAND_MANIFEST_PATH = './Database/command_manifest.sha256'
+
+def command_manifest() -> str:
+    """Hash the payload tree.sync() would upload, plus the application it goes to."""
+    payload = [
+        command.to_dict(bot.tree)
+        for command_type in (
+            discord.AppCommandType.chat_input,
+            discord.AppCommandType.user,
+            discord.AppCommandType.message
+        )
+        for command in bot.tree.get_commands(type=command_type)
+    ]
+    payload.sort(key=lambda command: (command['type'], command['name']))
+    manifest = json.dumps({'application_id': bot.application_id, 'commands': payload}, sort_keys=True)
+    return hashlib.sha256(manifest.encode()).hexdigest()
+
+async def sync_commands() -> bool:
+    """
+    Sync the command tree if it changed since the last sync.
+    
+    Set FORCE_COMMAND_SYNC=1 to sync regardless, e.g. after the commands
+    were changed from another copy of the bot. A failed sync is logged and
+    leaves the stored hash alone, so the next start tries again.
     
-    await bot.change_presence(
-        status=discord.Status.idle,
-        activity=discord.Game("/giveaway")
-    )
+    Returns:
+        bool: True if the commands were synced
+    """
+    manifest = command_manifest()
+    try:
+        with open(COMMAND_MANIFEST_PATH) as f:
+            synced = f.read().strip()
+    except OSError:
+        synced = None
     
-    await bot.tree.sync()
+    if synced == manifest and os.getenv('FORCE_COMMAND_SYNC') != '1':
+        logging.info("Command tree unchanged, skipping sync")
+        return False
+    
+    try:
+        await bot.tree.sync()
+    except (discord.HTTPException, aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logging.error(f"Could not sync command tree: {type(e).__name__}: {e}")
+        return False
+    with open(COMMAND_MANIFEST_PATH, 'w') as f:
+        f.write(manifest)
+    logging.info("Synced command tree")
+    return True
+
+async def prepare_database():
+    """Create the database and re-attach giveaways that were running before a restart."""
+    await init_db()
+    scheduler.start()
+    await restore_active_giveaways(bot)
+
+async def setup_hook():
+    """Run once after login, before connecting to the gateway."""
     # Ensure Database directory exists
-    if not os.path.exists('./Database'):
-        os.makedirs('./Database')
+    os.makedirs('./Database', exist_ok=True)
+    # Leave prompts are not stored per message; their buttons route by custom_id
+    bot.add_dynamic_items(LeaveGiveawayButton)
+    
+    bot.loop_lag_monitor = asyncio.create_task(metrics.monitor_loop_lag())
+    if METRICS_PORT:
+        bot.metrics_server = await metrics.serve(METRICS_PORT + CLUSTER_ID)
     
-    # Initialize database
-    await asyncio.to_thread(init_db)
+    # Commands are global, so one process of a cluster syncs them for all
+    if CLUSTER_ID == 0:
+        await asyncio.gather(sync_commands(), prepare_database())
+        # Move legacy JSON entrant lists into giveaway_entries in the background
+        bot.entry_migration = asyncio.create_task(migrate_entries())
+    else:
+        await prepare_database()
+    
+    logging.info(f"Setup done {time.perf_counter() - STARTED_AT:.2f}s after start")
+
+bot.setup_hook = setup_hook
+
+@bot.event
+async def on_ready():
+    """Handler for when the bot is ready and connected to Discord."""
+    logging.info(f"Logged in as {bot.user}")
+    logging.info(f"Serving {len(bot.guilds)} guilds on shards {sorted(bot.shards)} of {bot.shard_count}")
+    logging.info(f"Ready {time.perf_counter() - STARTED_AT:.2f}s after start")
+
+@bot.listen()
+async def on_interaction(interaction: discord.Interaction):
+    """Log how long after a cold start the first interaction arrived."""
+    if not bot.first_interaction:
+        bot.first_interaction = True
+        logging.info(f"First interaction {time.perf_counter() - STARTED_AT:.2f}s after start")
 
 from commands import create_giveaway, reroll, reroll_giveaway
 
@@ -69,10 +189,31 @@ bot.tree.command(name="giveaway", description="Create a new giveaway")(giveaway_
 bot.tree.command(name="reroll", description="Reroll a completed giveaway")(reroll_command)
 bot.tree.context_menu(name="Reroll Giveaway")(reroll_giveaway_command)
 
+async def shutdown():
+    """Write buffered joins and leaves, then disconnect so bot.start returns."""
+    logging.info("Shutting down")
+    await journal.flush()
+    await bot.close()
+
+def request_shutdown():
+    """Signal handler; a second signal while shutting down is ignored."""
+    if bot.shutdown_task is None:
+        bot.shutdown_task = asyncio.create_task(shutdown())
+
 async def main():
     """Main entry point to start the bot."""
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(signum, request_shutdown)
+        except NotImplementedError:
+            # Windows: Ctrl+C still interrupts, without the final flush
+            pass
+    
     async with bot:
         await bot.start(TOKEN, reconnect=True)
+    # Anything recorded while the connection was closing
+    await journal.flush()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,171 @@
+import os
+import sys
+import json
+import math
+import time
+import signal
+import logging
+import subprocess
+import urllib.request
+from dotenv import load_dotenv
+from logging_setup import setup_logging
+
+# Identify rate limit window per concurrency bucket, in seconds
+IDENTIFY_WINDOW = 5
+
+# A worker that exits sooner than this after starting counts as a quick failure
+STABLE_SECONDS = float(os.getenv('CLUSTER_STABLE_SECONDS', '300'))
+# Quick failures in a row after which a worker is no longer restarted
+MAX_FAILURES = int(os.getenv('CLUSTER_MAX_FAILURES', '5'))
+# Longest wait before restarting a worker, in seconds
+MAX_BACKOFF = float(os.getenv('CLUSTER_MAX_BACKOFF', '900'))
+
+def parse_shard_ids(value: str | None) -> list[int] | None:
+    """Parse SHARD_IDS such as "0-3" or "0,2,5" (None if unset)."""
+    if not value:
+        return None
+    shard_ids = []
+    for part in value.split(','):
+        start, _, end = part.partition('-')
+        shard_ids.extend(range(int(start), int(end or start) + 1))
+    return shard_ids
+
+def gateway_info(token: str) -> tuple[int, int]:
+    """
+    Ask Discord for the recommended shard count and identify concurrency.
+
+    Returns:
+        tuple: (shards, max_concurrency)
+    """
+    request = urllib.request.Request(
+        'https://discord.com/api/v10/gateway/bot',
+        headers={'Authorization': f'Bot {token}', 'User-Agent': 'GiftMaster cluster'}
+    )
+    with urllib.request.urlopen(request, timeout=30) as response:
+        data = json.load(response)
+    return data['shards'], data['session_start_limit']['max_concurrency']
+
+def split_shards(shard_count: int, processes: int) -> list[range]:
+    """Split shards 0..shard_count-1 into at most `processes` contiguous ranges."""
+    processes = max(1, min(processes, shard_count))
+    size = math.ceil(shard_count / processes)
+    return [range(start, min(start + size, shard_count)) for start in range(0, shard_count, size)]
+
+class Cluster:
+    """
+    Runs the bot as several processes, each owning a contiguous shard range.
+
+    Every worker is a normal `bot.py` process told which shards to connect
+    through SHARD_COUNT / SHARD_IDS / CLUSTER_ID, so each has its own event
+    loop, scheduler and journal for the guilds on its shards while they all
+    share the same database. Workers are started one identify window apart
+    and restarted if they exit unexpectedly, after a delay that doubles
+    with every quick failure so a worker that cannot start does not burn
+    through the daily identify budget. After MAX_FAILURES quick failures
+    in a row a worker is given up on, and once none are left running the
+    cluster exits with status 1.
+    """
+
+    def __init__(self, shard_count: int, processes: int, max_concurrency: int = 1):
+        """
+        Initialize the cluster.
+
+        Args:
+            shard_count: Total shards across all processes
+            processes: Number of worker processes
+            max_concurrency: Shards Discord lets us identify per window
+        """
+        self.shard_count = shard_count
+        self.ranges = split_shards(shard_count, processes)
+        self.max_concurrency = max_concurrency
+        self.workers = {}
+        self.started_at = {}
+        self.failures = dict.fromkeys(range(len(self.ranges)), 0)
+        self.restart_at = {}
+        self.next_identify = 0.0
+        self.stopping = False
+
+    def _identify_delay(self, cluster_id: int) -> float:
+        """Time this worker's shards need to identify before another worker may start."""
+        return math.ceil(len(self.ranges[cluster_id]) / self.max_concurrency) * IDENTIFY_WINDOW
+
+    def _spawn(self, cluster_id: int) -> None:
+        shards = self.ranges[cluster_id]
+        env = dict(
+            os.environ,
+            SHARD_COUNT=str(self.shard_count),
+            SHARD_IDS=f"{shards.start}-{shards.stop - 1}",
+            CLUSTER_ID=str(cluster_id)
+        )
+        self.workers[cluster_id] = subprocess.Popen([sys.executable, 'bot.py'], env=env)
+        self.started_at[cluster_id] = time.monotonic()
+        self.next_identify = self.started_at[cluster_id] + self._identify_delay(cluster_id)
+        logging.info(f"Started cluster {cluster_id} with shards {shards.start}-{shards.stop - 1}")
+
+    def _exited(self, cluster_id: int, returncode: int) -> None:
+        """Schedule a restart with backoff, or give up after too many quick failures."""
+        del self.workers[cluster_id]
+        if time.monotonic() - self.started_at[cluster_id] < STABLE_SECONDS:
+            self.failures[cluster_id] += 1
+        else:
+            self.failures[cluster_id] = 0
+
+        failures = self.failures[cluster_id]
+        if failures >= MAX_FAILURES:
+            logging.critical(
+                f"Cluster {cluster_id} exited with {returncode} after {failures} quick failures "
+                f"in a row; not restarting it"
+            )
+            return
+
+        delay = min(MAX_BACKOFF, self._identify_delay(cluster_id) * 2 ** failures)
+        self.restart_at[cluster_id] = time.monotonic() + delay
+        logging.error(f"Cluster {cluster_id} exited with {returncode}, restarting in {delay:.0f}s")
+
+    def _stop(self, signum, frame) -> None:
+        self.stopping = True
+        for process in self.workers.values():
+            process.terminate()
+
+    def run(self) -> None:
+        """Start every worker and supervise them until SIGTERM or SIGINT."""
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        for cluster_id, shards in enumerate(self.ranges):
+            if self.stopping:
+                break
+            self._spawn(cluster_id)
+            if cluster_id < len(self.ranges) - 1:
+                # Leave time for this worker's shards to identify before the next one starts
+                time.sleep(math.ceil(len(shards) / self.max_concurrency) * IDENTIFY_WINDOW)
+
+        while not self.stopping and (self.workers or self.restart_at):
+            time.sleep(1)
+            for cluster_id, process in list(self.workers.items()):
+                if process.poll() is not None and not self.stopping:
+                    self._exited(cluster_id, process.returncode)
+
+            # Restarts wait for their backoff and for the previous launch to identify
+            now = time.monotonic()
+            for cluster_id, restart_at in sorted(self.restart_at.items(), key=lambda item: item[1]):
+                if self.stopping or now < max(restart_at, self.next_identify):
+                    break
+                del self.restart_at[cluster_id]
+                self._spawn(cluster_id)
+
+        for process in self.workers.values():
+            process.wait()
+        if not self.stopping:
+            logging.critical("Every cluster worker has failed; exiting")
+            sys.exit(1)
+
+if __name__ == '__main__':
+    load_dotenv()
+    setup_logging('cluster.log')
+    processes = int(os.getenv('CLUSTER_PROCESSES', str(os.cpu_count() or 1)))
+    shard_count = int(os.getenv('SHARD_COUNT', '0'))
+    max_concurrency = 1
+    if not shard_count:
+        shard_count, max_concurrency = gateway_info(os.getenv('DISCORD_TOKEN'))
+    Cluster(shard_count, processes, max_concurrency).run()
@@ -1,9 +1,21 @@
 import discord
 from discord.ext import commands
-import random
-from db_operations import get_giveaway_from_db
+from async_db import get_giveaway_header, reroll_winners, schedule_export
 from modals import GiveawayModal
+from notifications import notifier
+from metrics import HANDLER_SECONDS, timed
 
+def _winner_embed_builder(title: str, jump_url: str):
+    """Return a function building the reroll DM embed for one winner."""
+    def build_embed(user: discord.User) -> discord.Embed:
+        embed = discord.Embed(title=" 🎊🎊 ** Congratulations ** 🎊🎊 ", color=user.color)
+        embed.add_field(name=f"", value=f"  <@{user.id}> ({user.name}) **You won the {title}**", inline=False)
+        embed.add_field(name="", value=f"You can check it here : {jump_url}", inline=False)
+        return embed
+    
+    return build_embed
+
+@timed(HANDLER_SECONDS, handler='giveaway')
 async def create_giveaway(bot: commands.Bot, interaction: discord.Interaction, image: discord.Attachment = None):
     """Slash command handler for creating a new giveaway."""
     if image is not None and not image.content_type.startswith('image'):
@@ -18,16 +30,25 @@ async def create_giveaway(bot: commands.Bot, interaction: discord.Interaction, i
         GiveawayModal(bot, ctx, str(ctx.author.mention), image)
     )
 
-async def reroll(bot: commands.Bot, interaction: discord.Interaction, giveaway_id: str, number_of_winners: int = None):
-    """Reroll a completed giveaway."""
-    data = get_giveaway_from_db(giveaway_id)
+async def _reroll(bot: commands.Bot, interaction: discord.Interaction, message: discord.PartialMessage | discord.Message,
+                  number_of_winners: int = None):
+    """
+    Draw new winners for a completed giveaway, excluding everyone who already won.
+
+    Args:
+        bot: The bot instance
+        interaction: The command interaction
+        message: The giveaway message
+        number_of_winners: Winners to draw (defaults to the giveaway's winner count)
+    """
+    message_id = str(message.id)
+    data = await get_giveaway_header(message_id)
 
-    if data is None:
+    if data is None or data["status"] != "ended":
         await interaction.response.send_message("This message is not a completed giveaway message!", ephemeral=True)
         return
         
-    creator_id = data.get("member", "")[2:-1]
-    if str(interaction.user.id) != creator_id and not interaction.user.guild_permissions.administrator:
+    if str(interaction.user.id) != data["host_id"] and not interaction.user.guild_permissions.administrator:
         await interaction.response.send_message(
             "You must be the giveaway creator or a server admin to reroll!",
             ephemeral=True
@@ -35,111 +56,32 @@ async def reroll(bot: commands.Bot, interaction: discord.Interaction, giveaway_i
         return
         
     if number_of_winners is None:
-        number_of_winners = 1
+        number_of_winners = int(data["Winner"]) if str(data["Winner"]).isdigit() else 1
         
-    Entrants = data["Entrants"]
-    entrants_ids = []
-    for participant in Entrants:
-        try:
-            if isinstance(participant, dict):
-                user_id = participant.get("id") or participant.get("user_id")
-            else:
-                user_id = participant
-                
-            if user_id:
-                user_id = str(user_id).strip()
-                if user_id.isdigit():
-                    entrants_ids.append(user_id)
-                    
-        except Exception as e:
-            print(f"Error processing participant: {e}")
-            continue
-            
-    if not entrants_ids:
+    winners = await reroll_winners(message_id, max(int(number_of_winners), 1), str(interaction.user.id))
+    if not winners:
         await interaction.response.send_message(
-            "Could not find valid participants. Please check the giveaway data.",
+            "There are no entrants left who have not already won.",
             ephemeral=True
         )
         return
         
-    number_of_winners = min(int(number_of_winners), len(entrants_ids))
-    winners = random.sample(entrants_ids, number_of_winners)
-    winners_mentions = [f"<@{winner}>" for winner in winners if winner is not None]
+    winners_mentions = [f"<@{winner}>" for winner in winners]
     await interaction.response.send_message(
         f"🎊🎊 Congratulations  {' '.join(winners_mentions)} **You won the {data['Title']}** 🎊🎊")
+    notifier.dispatch(bot, winners, _winner_embed_builder(data["Title"], message.jump_url))
+    schedule_export(message_id)
 
-    channel = bot.get_channel(interaction.channel.id)
-    message = await channel.fetch_message(int(giveaway_id))
-    for winner in winners:
-        user_data = next((u for u in Entrants if isinstance(u, dict) and u.get("id") == winner), None)
-        if user_data:
-            user = await bot.fetch_user(winner)
-            username = user_data.get("username", str(user))
-        else:
-            user = await bot.fetch_user(winner)
-            username = str(user)
-        embed = discord.Embed(title=" 🎊🎊 ** Congratulations ** 🎊🎊 ", color=user.color)
-        embed.add_field(name=f"", value=f"  <@{winner}> ({username}) **You won the {data['Title']}**", inline=False)
-        embed.add_field(name="", value=f"You can check it here : {message.jump_url}", inline=False)
-        await user.send(embed=embed)
-
-async def reroll_giveaway(bot: commands.Bot, interaction: discord.Interaction, message: discord.Message):
-    """Context menu handler for rerolling giveaways (right-click on message)."""
-    message_id = str(message.id)
-    data = get_giveaway_from_db(message_id)
-    
-    if data is None:
+@timed(HANDLER_SECONDS, handler='reroll')
+async def reroll(bot: commands.Bot, interaction: discord.Interaction, giveaway_id: str, number_of_winners: int = None):
+    """Reroll a completed giveaway."""
+    if not giveaway_id.isdigit():
         await interaction.response.send_message("This message is not a completed giveaway message!", ephemeral=True)
         return
         
-    creator_id = data.get("member", "")[2:-1]
-    if str(interaction.user.id) != creator_id and not interaction.user.guild_permissions.administrator:
-        await interaction.response.send_message(
-            "You must be the giveaway creator or a server admin to reroll!",
-            ephemeral=True
-        )
-        return
-        
-    number_of_winners = data["Winner"]
-    Entrants = data["Entrants"]
-    entrants_ids = []
-    for participant in Entrants:
-        try:
-            if isinstance(participant, dict):
-                user_id = participant.get("id") or participant.get("user_id")
-            else:
-                user_id = participant
-                
-            if user_id:
-                user_id = str(user_id).strip()
-                if user_id.isdigit():
-                    entrants_ids.append(user_id)
-                    
-        except Exception as e:
-            print(f"Error processing participant: {e}")
-            continue
-            
-    if not entrants_ids:
-        await interaction.response.send_message(
-            "Could not find valid participants. Please check the giveaway data.",
-            ephemeral=True
-        )
-        return
-        
-    number_of_winners = min(int(number_of_winners), len(entrants_ids))
-    winners = random.sample(entrants_ids, number_of_winners)
-    winners_mentions = [f"<@{winner}>" for winner in winners if winner is not None]
-    await interaction.response.send_message(
-        f"🎊🎊 Congratulations  {' '.join(winners_mentions)} **You won the {data['Title']}** 🎊🎊")
-    for winner in winners:
-        user_data = next((u for u in Entrants if isinstance(u, dict) and u.get("id") == winner), None)
-        if user_data:
-            user = await bot.fetch_user(winner)
-            username = user_data.get("username", str(user))
-        else:
-            user = await bot.fetch_user(winner)
-            username = str(user)
-        embed = discord.Embed(title=" 🎊🎊 ** Congratulations ** 🎊🎊 ", color=user.color)
-        embed.add_field(name=f"", value=f"  <@{winner}> ({username}) **You won the {data['Title']}**", inline=False)
-        embed.add_field(name="", value=f"You can check it here : {message.jump_url}", inline=False)
-        await user.send(embed=embed)
+    await _reroll(bot, interaction, interaction.channel.get_partial_message(int(giveaway_id)), number_of_winners or 1)
+
+@timed(HANDLER_SECONDS, handler='reroll_giveaway')
+async def reroll_giveaway(bot: commands.Bot, interaction: discord.Interaction, message: discord.Message):
+    """Context menu handler for rerolling giveaways (right-click on message)."""
+    await _reroll(bot, interaction, message)
@@ -0,0 +1,133 @@
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+DB_PATH = os.getenv('DATABASE_PATH', './Database/giveaways.db')
+
+class ConnectionManager:
+    """
+    Long-lived SQLite connections shared by the bot and the web app.
+
+    Reads borrow a connection from a small pool so each Flask worker thread
+    reuses an open handle. Writes go through one dedicated connection guarded
+    by a lock, which matches SQLite's single-writer model and avoids busy
+    retries between the bot's own writers. Every connection runs in WAL mode
+    with tuned pragmas and keeps a prepared-statement cache.
+    """
+
+    def __init__(self, path: str = DB_PATH, pool_size: int = None,
+                 statement_cache_size: int = 256):
+        """
+        Initialize the connection manager. Connections are opened lazily.
+
+        Args:
+            path: Path to the SQLite database file
+            pool_size: Maximum number of idle reader connections kept open
+                (defaults to DB_POOL_SIZE or 8)
+            statement_cache_size: Prepared statements cached per connection
+        """
+        self.path = path
+        self.pool_size = pool_size or int(os.getenv('DB_POOL_SIZE', '8'))
+        self.statement_cache_size = statement_cache_size
+        self.mmap_size = int(os.getenv('DB_MMAP_SIZE', str(256 * 1024 * 1024)))
+        self.cache_size_kib = int(os.getenv('DB_CACHE_SIZE_KIB', str(64 * 1024)))
+        self._write_lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        """Forget all connections, e.g. in a freshly forked worker process."""
+        self._pid = os.getpid()
+        self._readers = queue.LifoQueue(maxsize=self.pool_size)
+        self._writer = None
+
+    def _check_pid(self) -> None:
+        """SQLite connections must not cross a fork; start over in a child."""
+        if self._pid != os.getpid():
+            self._reset()
+
+    def connect(self) -> sqlite3.Connection:
+        """Open a new connection with the standard pragmas applied."""
+        conn = sqlite3.connect(
+            self.path,
+            timeout=30,
+            check_same_thread=False,
+            cached_statements=self.statement_cache_size
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.execute(f'PRAGMA mmap_size={self.mmap_size}')
+        conn.execute(f'PRAGMA cache_size=-{self.cache_size_kib}')
+        return conn
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a pooled connection for read-only queries."""
+        self._check_pid()
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            conn = self.connect()
+
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            try:
+                self._readers.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+    @contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        """
+        Use the dedicated writer connection inside a transaction.
+
+        The transaction is committed when the block exits normally and
+        rolled back if it raises.
+        """
+        self._check_pid()
+        with self._write_lock:
+            if self._writer is None:
+                self._writer = self.connect()
+            conn = self._writer
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            else:
+                conn.commit()
+
+    def warm(self, readers: int = 1) -> None:
+        """
+        Open reader connections ahead of the first request.
+
+        Args:
+            readers: Number of connections to open, capped at the pool size
+        """
+        self._check_pid()
+        for _ in range(min(readers, self.pool_size) - self._readers.qsize()):
+            try:
+                self._readers.put_nowait(self.connect())
+            except queue.Full:
+                break
+
+    def close(self) -> None:
+        """Close every open connection."""
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
+
+db = ConnectionManager()
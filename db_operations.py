@@ -1,56 +1,274 @@
+import os
 import sqlite3
 import json
 import logging
-from typing import Any
-
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('bot.log'),
-        logging.StreamHandler()
-    ]
-)
+import time
+import random
+from typing import Any, Iterable, Iterator
+
+from database import db
+from entrants import weighted_sample
+from metrics import timed_query
 
+USER_BATCH_SIZE = 500
+MIGRATION_BATCH_SIZE = 100
+# Rerolls expected to need more seeks than this read every eligible entrant instead
+REROLL_SEEK_LIMIT = 16
+PROFILE_REFRESH_INTERVAL = float(os.getenv('PROFILE_REFRESH_INTERVAL', '3600'))
+
+@timed_query
 def init_db():
     """Initialize the SQLite database and create giveaways table if it doesn't exist."""
-    conn = sqlite3.connect('./Database/giveaways.db')
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS giveaways (
-        message_id TEXT PRIMARY KEY,
-        member TEXT,
-        title TEXT,
-        winner TEXT,
-        time INTEGER,
-        description TEXT,
-        entries INTEGER,
-        entrants TEXT,
-        winners TEXT
-    )
-    ''')
-    
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS users (
-        user_id TEXT PRIMARY KEY,
-        username TEXT,
-        display_name TEXT,
-        discriminator TEXT,
-        avatar TEXT,
-        created_at TEXT,
-        joined_at TEXT
-    )
-    ''')
-    
-    conn.commit()
-    conn.close()
+    with db.writer() as conn:
+        cursor = conn.cursor()
+
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS giveaways (
+            message_id TEXT PRIMARY KEY,
+            member TEXT,
+            title TEXT,
+            winner TEXT,
+            time INTEGER,
+            description TEXT,
+            entries INTEGER,
+            entrants TEXT,
+            winners TEXT
+        )
+        ''')
+
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            user_id TEXT PRIMARY KEY,
+            username TEXT,
+            display_name TEXT,
+            discriminator TEXT,
+            avatar TEXT,
+            created_at TEXT,
+            joined_at TEXT
+        )
+        ''')
+        _ensure_column(cursor, 'users', 'refreshed_at', 'REAL')
+
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS giveaway_entries (
+            message_id TEXT NOT NULL,
+            user_id TEXT NOT NULL,
+            entered_at REAL,
+            is_winner INTEGER NOT NULL DEFAULT 0,
+            UNIQUE (message_id, user_id)
+        )
+        ''')
+        # Tickets held by the entrant (bonus entries), see entrants.entry_weight
+        _ensure_column(cursor, 'giveaway_entries', 'weight', 'REAL NOT NULL DEFAULT 1')
+        # Entries of one giveaway in rowid (entry) order, for counts and paging
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_entries_message ON giveaway_entries (message_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_entries_user ON giveaway_entries (user_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_entries_winners ON giveaway_entries (message_id) WHERE is_winner = 1')
+        # Covers rerolls: eligible entrants are counted, weighed and picked without touching the table
+        cursor.execute('DROP INDEX IF EXISTS idx_entries_eligible')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_entries_draw ON giveaway_entries (message_id, is_winner, weight, user_id)')
+
+        # One row per winner drawn by a reroll, in draw order
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS giveaway_rerolls (
+            message_id TEXT NOT NULL,
+            user_id TEXT NOT NULL,
+            rerolled_by TEXT,
+            rerolled_at REAL NOT NULL
+        )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_rerolls_message ON giveaway_rerolls (message_id)')
+
+        _ensure_column(cursor, 'giveaways', 'entries_migrated', 'INTEGER NOT NULL DEFAULT 0')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_giveaways_unmigrated ON giveaways (message_id) WHERE entries_migrated = 0')
+
+        # Live state so active giveaways can be resumed after a restart
+        _ensure_column(cursor, 'giveaways', 'status', "TEXT NOT NULL DEFAULT 'ended'")
+        _ensure_column(cursor, 'giveaways', 'guild_id', 'TEXT')
+        _ensure_column(cursor, 'giveaways', 'channel_id', 'TEXT')
+        _ensure_column(cursor, 'giveaways', 'host_id', 'TEXT')
+        _ensure_column(cursor, 'giveaways', 'image_url', 'TEXT')
+        _ensure_column(cursor, 'giveaways', 'end_timestamp', 'REAL')
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_giveaways_active ON giveaways (end_timestamp) WHERE status = 'active'")
+
+        # Bumped on every change to a giveaway's page content, for render caches
+        _ensure_column(cursor, 'giveaways', 'version', 'INTEGER NOT NULL DEFAULT 0')
+
     logging.info("SQLite database initialized")
 
+def _ensure_column(cursor: sqlite3.Cursor, table: str, column: str, definition: str) -> None:
+    """Add a column to an existing table if it is missing."""
+    cursor.execute(f'PRAGMA table_info({table})')
+    if column not in {row[1] for row in cursor.fetchall()}:
+        cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+
+def _decode_id_list(value: str | None) -> list:
+    """Decode a legacy JSON (or malformed JSON-like) list of IDs."""
+    if not isinstance(value, str):
+        return []
+    try:
+        return json.loads(value)
+    except json.JSONDecodeError:
+        if '"' in value:
+            return [id.strip('" ') for id in value.strip('[]').split(',')]
+        return value.strip('[]').split()
+
+def _mention_to_id(mention: Any) -> str:
+    """Turn a stored winner mention like '<@123>' into '123'."""
+    return str(mention).strip('<@!>')
+
+def _write_entries(cursor: sqlite3.Cursor, message_id: str, entrants_ids: list,
+                   winner_ids: list, entered_at: float) -> None:
+    """Replace the entry rows of a giveaway."""
+    winners = set(winner_ids)
+    cursor.execute('DELETE FROM giveaway_entries WHERE message_id = ?', (message_id,))
+    cursor.executemany('''
+    INSERT OR IGNORE INTO giveaway_entries (message_id, user_id, entered_at, is_winner)
+    VALUES (?, ?, ?, ?)
+    ''', ((message_id, str(user_id), entered_at, int(str(user_id) in winners)) for user_id in entrants_ids))
+    cursor.executemany('''
+    INSERT INTO giveaway_entries (message_id, user_id, entered_at, is_winner)
+    VALUES (?, ?, ?, 1)
+    ON CONFLICT (message_id, user_id) DO UPDATE SET is_winner = 1
+    ''', ((message_id, user_id, entered_at) for user_id in winners))
+
+@timed_query
+def migrate_entries_batch(batch_size: int = MIGRATION_BATCH_SIZE, message_id: str = None) -> int:
+    """
+    Move one batch of legacy JSON entrant and winner lists into giveaway_entries.
+
+    Args:
+        batch_size: Number of giveaways migrated in this transaction
+        message_id: Only migrate this giveaway (if it still needs it)
+
+    Returns:
+        int: Number of giveaways migrated; below batch_size once none are left
+    """
+    with db.writer() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            'SELECT message_id, entrants, winners FROM giveaways '
+            'WHERE entries_migrated = 0 AND (? IS NULL OR message_id = ?) LIMIT ?',
+            (message_id, message_id, batch_size)
+        )
+        rows = cursor.fetchall()
+        for row in rows:
+            winner_ids = [_mention_to_id(w) for w in _decode_id_list(row["winners"])]
+            _write_entries(cursor, row["message_id"], _decode_id_list(row["entrants"]), winner_ids, None)
+            cursor.execute('''
+            UPDATE giveaways SET entries_migrated = 1, entrants = NULL, winners = NULL
+            WHERE message_id = ?
+            ''', (row["message_id"],))
+    return len(rows)
+
+def migrate_entries(batch_size: int = MIGRATION_BATCH_SIZE, message_id: str = None) -> int:
+    """
+    Move legacy JSON entrant and winner lists into giveaway_entries.
+
+    Runs in short batched transactions so the bot and web app keep working
+    while it progresses; readers fall back to the JSON columns for rows that
+    have not been migrated yet. The bot runs the backfill through
+    async_db.migrate_entries, which submits one batch at a time.
+
+    Args:
+        batch_size: Number of giveaways migrated per transaction
+        message_id: Only migrate this giveaway (if it still needs it)
+
+    Returns:
+        int: Number of giveaways migrated
+    """
+    migrated = 0
+    while True:
+        batch = migrate_entries_batch(batch_size, message_id)
+        migrated += batch
+        if batch < batch_size:
+            break
+
+    if migrated:
+        logging.info(f"Migrated entries of {migrated} giveaways")
+    return migrated
+
+def _sync_user_profiles(cursor: sqlite3.Cursor, entrants: list) -> None:
+    """
+    Bulk upsert entrant profiles, writing only rows that actually changed.
+
+    Profiles refreshed less than PROFILE_REFRESH_INTERVAL seconds ago are
+    left alone, and an upsert whose content matches the stored row is a
+    no-op, so regulars who enter every giveaway cost no writes. A missing
+    joined_at never erases a stored one.
+
+    Args:
+        cursor: Cursor inside a write transaction
+        entrants: Entrants; only user data dictionaries are stored
+    """
+    now = time.time()
+    stale_before = now - PROFILE_REFRESH_INTERVAL
+    cursor.executemany('''
+    INSERT INTO users
+    (user_id, username, display_name, discriminator, avatar, created_at, joined_at, refreshed_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (user_id) DO UPDATE SET
+        username = excluded.username,
+        display_name = excluded.display_name,
+        discriminator = excluded.discriminator,
+        avatar = excluded.avatar,
+        created_at = excluded.created_at,
+        joined_at = COALESCE(excluded.joined_at, users.joined_at),
+        refreshed_at = excluded.refreshed_at
+    WHERE (users.refreshed_at IS NULL OR users.refreshed_at < ?)
+      AND (users.username, users.display_name, users.discriminator, users.avatar,
+           users.created_at, users.joined_at)
+          IS NOT (excluded.username, excluded.display_name, excluded.discriminator, excluded.avatar,
+                  excluded.created_at, COALESCE(excluded.joined_at, users.joined_at))
+    ''', ((
+        user_data.get("id"),
+        user_data.get("username"),
+        user_data.get("display_name"),
+        user_data.get("discriminator"),
+        user_data.get("avatar"),
+        user_data.get("created_at"),
+        user_data.get("joined_at"),
+        now,
+        stale_before
+    ) for user_data in entrants if isinstance(user_data, dict)))
+
+def _upsert_giveaway(cursor: sqlite3.Cursor, message_id: str, data: dict) -> None:
+    """Insert or update the giveaways row without touching its entries."""
+    cursor.execute('''
+    INSERT INTO giveaways
+    (message_id, member, title, winner, time, description, entries, entrants, winners, entries_migrated, status)
+    VALUES (?, ?, ?, ?, ?, ?, ?, NULL, NULL, 1, 'ended')
+    ON CONFLICT (message_id) DO UPDATE SET
+        member = excluded.member,
+        title = excluded.title,
+        winner = excluded.winner,
+        time = excluded.time,
+        description = excluded.description,
+        entries = excluded.entries,
+        entrants = NULL,
+        winners = NULL,
+        entries_migrated = 1,
+        status = 'ended',
+        version = giveaways.version + 1
+    ''', (
+        message_id,
+        data.get("member", ""),
+        data.get("Title", ""),
+        data.get("Winner", ""),
+        data.get("Time", 0),
+        data.get("Description", ""),
+        data.get("Entries", 0)
+    ))
+
+def _winner_ids(data: dict) -> list[str]:
+    """Extract winner user IDs from giveaway data."""
+    return [_mention_to_id(u.get("id") if isinstance(u, dict) else u) for u in data.get("Winners", [])]
+
+@timed_query
 def save_giveaway_to_db(message_id: str, data: dict) -> None:
     """
-    Save giveaway data to SQLite database.
-    
+    Save giveaway data to SQLite database, replacing its entries.
+
     Args:
         message_id: The Discord message ID of the giveaway
         data: Dictionary containing giveaway data including:
@@ -63,115 +281,388 @@ def save_giveaway_to_db(message_id: str, data: dict) -> None:
             - Entrants: List of user IDs who entered
             - Winners: List of winner user IDs
     """
-    conn = sqlite3.connect('./Database/giveaways.db')
-    cursor = conn.cursor()
-    
-    for user_data in data.get("Entrants", []):
-        if isinstance(user_data, dict):  
-            cursor.execute('''
-            INSERT OR REPLACE INTO users 
-            (user_id, username, display_name, discriminator, avatar, created_at, joined_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                user_data.get("id"),
-                user_data.get("username"),
-                user_data.get("display_name"),
-                user_data.get("discriminator"),
-                user_data.get("avatar"),
-                user_data.get("created_at"),
-                user_data.get("joined_at")
-            ))
-    
-    entrants_ids = [u.get("id") if isinstance(u, dict) else u for u in data.get("Entrants", [])]
-    winners_ids = [u.get("id") if isinstance(u, dict) else u for u in data.get("Winners", [])]
-    entrants_json = json.dumps(entrants_ids)
-    winners_json = json.dumps(winners_ids)
-    
-    cursor.execute('''
-    INSERT OR REPLACE INTO giveaways 
-    (message_id, member, title, winner, time, description, entries, entrants, winners)
-    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-    ''', (
-        message_id,
-        data.get("member", ""),
-        data.get("Title", ""),
-        data.get("Winner", ""),
-        data.get("Time", 0),
-        data.get("Description", ""),
-        data.get("Entries", 0),
-        entrants_json,
-        winners_json
-    ))
-    
-    conn.commit()
-    conn.close()
+    with db.writer() as conn:
+        cursor = conn.cursor()
+        _sync_user_profiles(cursor, data.get("Entrants", []))
+        entrants_ids = [u.get("id") if isinstance(u, dict) else u for u in data.get("Entrants", [])]
+        _upsert_giveaway(cursor, message_id, data)
+        _write_entries(cursor, message_id, entrants_ids, _winner_ids(data), time.time())
+
     logging.info(f"Saved giveaway {message_id} to database")
 
+@timed_query
+def apply_entry_events(events: list[tuple]) -> None:
+    """
+    Apply journaled joins and leaves to giveaway_entries in one transaction.
+
+    Args:
+        events: (message_id, user_id, timestamp, joined, weight) tuples in
+            the order they happened; only the last event per user and
+            giveaway counts
+    """
+    latest = {}
+    for message_id, user_id, timestamp, joined, weight in events:
+        latest.pop((message_id, user_id), None)
+        latest[(message_id, user_id)] = (timestamp, joined, weight)
+
+    with db.writer() as conn:
+        cursor = conn.cursor()
+        cursor.executemany('''
+        INSERT OR IGNORE INTO giveaway_entries (message_id, user_id, entered_at, weight)
+        VALUES (?, ?, ?, ?)
+        ''', ((message_id, user_id, timestamp, weight)
+              for (message_id, user_id), (timestamp, joined, weight) in latest.items() if joined))
+        cursor.executemany(
+            'DELETE FROM giveaway_entries WHERE message_id = ? AND user_id = ?',
+            (key for key, (_, joined, _) in latest.items() if not joined)
+        )
+        cursor.executemany(
+            'UPDATE giveaways SET version = version + 1 WHERE message_id = ?',
+            ((message_id,) for message_id in {message_id for message_id, _ in latest})
+        )
+
+@timed_query
+def finalize_giveaway(message_id: str, data: dict) -> None:
+    """
+    Save an ended giveaway whose entries were already journaled.
+
+    Only the giveaway row, entrant profiles and winner flags are written;
+    the entry rows themselves are left as the journal recorded them.
+
+    Args:
+        message_id: The Discord message ID of the giveaway
+        data: Giveaway data in the same format as save_giveaway_to_db
+    """
+    with db.writer() as conn:
+        cursor = conn.cursor()
+        _sync_user_profiles(cursor, data.get("Entrants", []))
+        _upsert_giveaway(cursor, message_id, data)
+        cursor.executemany(
+            'UPDATE giveaway_entries SET is_winner = 1 WHERE message_id = ? AND user_id = ?',
+            ((message_id, user_id) for user_id in _winner_ids(data))
+        )
+
+    logging.info(f"Saved giveaway {message_id} to database")
+
+@timed_query
+def create_active_giveaway(message_id: str, data: dict) -> None:
+    """
+    Record a newly started giveaway so it can be resumed after a restart.
+
+    Args:
+        message_id: The Discord message ID of the giveaway
+        data: Dictionary containing giveaway data including:
+            - member: Host member mention
+            - host_id: Host user ID
+            - guild_id: Guild ID
+            - channel_id: Channel ID
+            - Title: Giveaway title
+            - Winner: Number of winners
+            - Time: Duration in seconds
+            - Description: Giveaway description
+            - image_url: Optional image URL
+            - end_timestamp: UNIX timestamp when the giveaway ends
+    """
+    with db.writer() as conn:
+        conn.execute('''
+        INSERT OR REPLACE INTO giveaways
+        (message_id, member, title, winner, time, description, entries, entries_migrated,
+         status, guild_id, channel_id, host_id, image_url, end_timestamp)
+        VALUES (?, ?, ?, ?, ?, ?, 0, 1, 'active', ?, ?, ?, ?, ?)
+        ''', (
+            message_id,
+            data.get("member", ""),
+            data.get("Title", ""),
+            data.get("Winner", ""),
+            data.get("Time", 0),
+            data.get("Description", ""),
+            data.get("guild_id"),
+            data.get("channel_id"),
+            data.get("host_id"),
+            data.get("image_url"),
+            data.get("end_timestamp")
+        ))
+
+@timed_query
+def delete_giveaway(message_id: str) -> None:
+    """
+    Remove a giveaway and its entries, e.g. when it was cancelled.
+
+    Args:
+        message_id: The Discord message ID of the giveaway
+    """
+    with db.writer() as conn:
+        conn.execute('DELETE FROM giveaway_entries WHERE message_id = ?', (message_id,))
+        conn.execute('DELETE FROM giveaway_rerolls WHERE message_id = ?', (message_id,))
+        conn.execute('DELETE FROM giveaways WHERE message_id = ?', (message_id,))
+
+@timed_query
+def get_giveaway_header(message_id: str) -> dict | None:
+    """
+    Load a giveaway's own fields without touching its entries.
+
+    Args:
+        message_id: The Discord message ID of the giveaway
+
+    Returns:
+        Dictionary with "member", "host_id", "Title", "Winner" and "status",
+        or None if not found
+    """
+    with db.reader() as conn:
+        row = conn.execute(
+            'SELECT member, host_id, title, winner, status FROM giveaways WHERE message_id = ?',
+            (message_id,)
+        ).fetchone()
+    if row is None:
+        return None
+    return {
+        "member": row["member"],
+        "host_id": row["host_id"] or _mention_to_id(row["member"] or ""),
+        "Title": row["title"],
+        "Winner": row["winner"],
+        "status": row["status"]
+    }
+
+@timed_query
+def reroll_winners(message_id: str, count: int, rerolled_by: str = None) -> list[str]:
+    """
+    Draw new winners from the entrants who have not won yet and record them.
+
+    Each winner is drawn with probability proportional to their weight.
+    Eligible entrants are counted on a covering index. When the draw should
+    take at most REROLL_SEEK_LIMIT seeks, each winner is fetched by seeking to
+    a random offset (accepted with probability weight / max weight when weights
+    differ), so a small draw never loads the entrant list; larger or heavily
+    skewed draws load the eligible entrants once instead, as does a rejection
+    draw that runs over its seek budget. The draw, the winner flags and the
+    reroll history share one BEGIN IMMEDIATE transaction, so concurrent
+    rerolls, even from other processes, can never pick the same person twice.
+    The giveaway's version is bumped so cached summary pages pick up the new
+    winners.
+
+    Args:
+        message_id: The Discord message ID of the giveaway
+        count: Number of winners to draw
+        rerolled_by: User ID of whoever requested the reroll
+
+    Returns:
+        List of the new winners' user IDs; shorter than count (possibly
+        empty) when fewer entrants are left
+    """
+    migrate_entries(message_id=message_id)
+
+    with db.writer() as conn:
+        # sqlite3 only opens a transaction at the first write; take the write
+        # lock before counting so another process cannot draw in between
+        conn.execute('BEGIN IMMEDIATE')
+        eligible, total_weight, lightest, heaviest = conn.execute(
+            'SELECT COUNT(*), SUM(weight), MIN(weight), MAX(weight) FROM giveaway_entries '
+            'WHERE message_id = ? AND is_winner = 0',
+            (message_id,)
+        ).fetchone()
+        count = min(count, eligible)
+        if count <= 0:
+            return []
+
+        def seek(offset: int) -> sqlite3.Row:
+            return conn.execute(
+                'SELECT user_id, weight FROM giveaway_entries WHERE message_id = ? AND is_winner = 0 LIMIT 1 OFFSET ?',
+                (message_id, offset)
+            ).fetchone()
+
+        def load_and_sample(k: int, drawn: list) -> list[str]:
+            # Each seek costs O(offset), so past a few seeks one scan is cheaper
+            drawn = set(drawn)
+            rows = [row for row in conn.execute(
+                'SELECT user_id, weight FROM giveaway_entries WHERE message_id = ? AND is_winner = 0',
+                (message_id,)
+            ) if row[0] not in drawn]
+            return weighted_sample([row[0] for row in rows], [row[1] for row in rows], k)
+
+        # A weighted winner takes max / mean weight tries on average
+        expected_seeks = count * heaviest * eligible / total_weight
+        if expected_seeks > REROLL_SEEK_LIMIT:
+            winner_ids = load_and_sample(count, [])
+        elif lightest == heaviest:
+            winner_ids = [seek(offset)[0] for offset in random.sample(range(eligible), count)]
+        else:
+            seen, winner_ids = set(), []
+            attempts = 0
+            while len(winner_ids) < count:
+                attempts += 1
+                if attempts > 2 * REROLL_SEEK_LIMIT:
+                    # Unlucky run; draw the rest from the remaining entrants
+                    winner_ids += load_and_sample(count - len(winner_ids), winner_ids)
+                    break
+                offset = random.randrange(eligible)
+                if offset in seen:
+                    continue
+                user_id, weight = seek(offset)
+                if random.random() * heaviest < weight:
+                    seen.add(offset)
+                    winner_ids.append(user_id)
+
+        now = time.time()
+        conn.executemany(
+            'UPDATE giveaway_entries SET is_winner = 1 WHERE message_id = ? AND user_id = ?',
+            ((message_id, user_id) for user_id in winner_ids)
+        )
+        conn.executemany(
+            'INSERT INTO giveaway_rerolls (message_id, user_id, rerolled_by, rerolled_at) VALUES (?, ?, ?, ?)',
+            ((message_id, user_id, rerolled_by, now) for user_id in winner_ids)
+        )
+        conn.execute('UPDATE giveaways SET version = version + 1 WHERE message_id = ?', (message_id,))
+
+    logging.info(f"Rerolled {len(winner_ids)} winners for giveaway {message_id}")
+    return winner_ids
+
+@timed_query
+def get_active_giveaways() -> list[dict]:
+    """
+    Load every active giveaway with its entrant IDs using two bulk queries.
+
+    Returns:
+        List of dictionaries with the fields stored by create_active_giveaway
+        plus "message_id", "Entrants" (user IDs in entry order) and
+        "Weights" (the matching entry weights)
+    """
+    with db.reader() as conn:
+        rows = conn.execute("""
+        SELECT message_id, member, title, winner, time, description,
+               guild_id, channel_id, host_id, image_url, end_timestamp
+        FROM giveaways WHERE status = 'active'
+        """).fetchall()
+
+        giveaways = {}
+        for row in rows:
+            giveaways[row["message_id"]] = {
+                "message_id": row["message_id"],
+                "member": row["member"],
+                "Title": row["title"],
+                "Winner": row["winner"],
+                "Time": row["time"],
+                "Description": row["description"],
+                "guild_id": row["guild_id"],
+                "channel_id": row["channel_id"],
+                "host_id": row["host_id"],
+                "image_url": row["image_url"],
+                "end_timestamp": row["end_timestamp"],
+                "Entrants": [],
+                "Weights": []
+            }
+
+        cursor = conn.execute("""
+        SELECT e.message_id, e.user_id, e.weight
+        FROM giveaway_entries e
+        JOIN giveaways g ON g.message_id = e.message_id
+        WHERE g.status = 'active'
+        ORDER BY e.rowid
+        """)
+        for message_id, user_id, weight in cursor:
+            giveaway = giveaways[message_id]
+            giveaway["Entrants"].append(user_id)
+            giveaway["Weights"].append(weight)
+
+    return list(giveaways.values())
+
+def _fetch_users(cursor: sqlite3.Cursor, user_ids: list) -> dict:
+    """
+    Hydrate user profiles with chunked set-based queries.
+
+    Args:
+        cursor: Cursor with sqlite3.Row as row factory
+        user_ids: User IDs to look up, duplicates allowed
+
+    Returns:
+        Dictionary mapping user ID strings to user row dictionaries
+    """
+    unique_ids = list(dict.fromkeys(str(user_id) for user_id in user_ids))
+    users = {}
+
+    for start in range(0, len(unique_ids), USER_BATCH_SIZE):
+        chunk = unique_ids[start:start + USER_BATCH_SIZE]
+        placeholders = ','.join('?' * len(chunk))
+        cursor.execute(f'SELECT * FROM users WHERE user_id IN ({placeholders})', chunk)
+        for row in cursor.fetchall():
+            users[row["user_id"]] = dict(row)
+
+    return users
+
+def _load_entry_ids(cursor: sqlite3.Cursor, row: sqlite3.Row) -> tuple[list, list]:
+    """
+    Load entrant IDs and winner mentions of a giveaway in entry order.
+
+    Rows not yet moved by migrate_entries are read from their JSON columns.
+    """
+    if not row["entries_migrated"]:
+        return _decode_id_list(row["entrants"]), _decode_id_list(row["winners"])
+
+    cursor.execute(
+        'SELECT user_id, is_winner FROM giveaway_entries WHERE message_id = ? ORDER BY rowid',
+        (row["message_id"],)
+    )
+    entrants_ids = []
+    winners = []
+    for user_id, is_winner in cursor.fetchall():
+        entrants_ids.append(user_id)
+        if is_winner:
+            winners.append(f"<@{user_id}>")
+    return entrants_ids, winners
+
+@timed_query
+def get_giveaway_version(message_id: str) -> tuple[int, str] | None:
+    """
+    Look up a giveaway's content version and status without loading it.
+
+    Args:
+        message_id: The Discord message ID of the giveaway
+
+    Returns:
+        tuple: (version, status), or None if the giveaway does not exist
+    """
+    with db.reader() as conn:
+        row = conn.execute(
+            'SELECT version, status FROM giveaways WHERE message_id = ?', (message_id,)
+        ).fetchone()
+    return (row["version"], row["status"]) if row else None
+
+@timed_query
 def get_giveaway_from_db(message_id: str) -> dict | None:
     """
     Retrieve giveaway data from SQLite database.
-    
+
     Args:
         message_id: The Discord message ID of the giveaway
-        
+
     Returns:
         Dictionary containing giveaway data or None if not found
     """
-    conn = sqlite3.connect('./Database/giveaways.db')
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    
-    cursor.execute('SELECT * FROM giveaways WHERE message_id = ?', (message_id,))
-    row = cursor.fetchone()
-    
-    if row is None:
-        conn.close()
-        return None
-    
-    data = dict(row)
-    
-    entrants_str = data.get("entrants", "[]")
-    if isinstance(entrants_str, str):
-        try:
-            entrants_ids = json.loads(entrants_str)
-        except json.JSONDecodeError:
-            if '"' in entrants_str:
-                entrants_ids = [id.strip('" ') for id in entrants_str.strip('[]').split(',')]
-            else:
-                entrants_ids = entrants_str.strip('[]').split()
-    
-    winners_str = data.get("winners", "[]")
-    if isinstance(winners_str, str):
-        try:
-            winners_ids = json.loads(winners_str)
-        except json.JSONDecodeError:
-            if '"' in winners_str:
-                winners_ids = [id.strip('" ') for id in winners_str.strip('[]').split(',')]
-            else:
-                winners_ids = winners_str.strip('[]').split()
-
-    
-    data["Entrants"] = []
-    data["Winners"] = []
-    cursor.execute('SELECT * FROM users WHERE user_id = ?', ((data.get("member", "")[2:-1]),))
-    data["hoster"] = cursor.fetchone()
-
-    
+    with db.reader() as conn:
+        cursor = conn.cursor()
+
+        cursor.execute('SELECT * FROM giveaways WHERE message_id = ?', (message_id,))
+        row = cursor.fetchone()
+
+        if row is None:
+            return None
+
+        data = dict(row)
+
+        entrants_ids, winners_ids = _load_entry_ids(cursor, row)
+
+        data["Entrants"] = []
+        data["Winners"] = []
+        cursor.execute('SELECT * FROM users WHERE user_id = ?', ((data.get("member", "")[2:-1]),))
+        data["hoster"] = cursor.fetchone()
+
+        winner_user_ids = [str(user_id)[2:-1] for user_id in winners_ids]
+        users = _fetch_users(cursor, entrants_ids + winner_user_ids)
+
     for user_id in entrants_ids:
-        cursor.execute('SELECT * FROM users WHERE user_id = ?', (user_id,))
-        user_row = cursor.fetchone()
-        if user_row:
-            data["Entrants"].append(dict(user_row))
-        else:
-            data["Entrants"].append(user_id)  
-    
-    for user_id in winners_ids:
-        cursor.execute('SELECT * FROM users WHERE user_id = ?', (int(user_id[2:-1]),))
-        user_row = cursor.fetchone()
-        if user_row:
-            data["Winners"].append(dict(user_row))
-        else:
-            data["Winners"].append(user_id) 
+        data["Entrants"].append(users.get(str(user_id), user_id))
+
+    for user_id, mention in zip(winner_user_ids, winners_ids):
+        data["Winners"].append(users.get(user_id, mention))
     result = {
         "member": data.get("member", ""),
         "Title": data.get("title", ""),
@@ -184,31 +675,44 @@ def get_giveaway_from_db(message_id: str) -> dict | None:
         "Hoster": data.get("hoster", [])
 
     }
-    conn.close()
     return result
 
+@timed_query
 def get_all_giveaways_from_db() -> dict:
     """
     Retrieve all giveaways from SQLite database.
-    
+
+    Everything is loaded into memory at once; use iter_giveaways to walk
+    large histories in fixed memory.
+
     Returns:
         Dictionary where keys are message IDs and values are giveaway data dictionaries
     """
-    conn = sqlite3.connect('./Database/giveaways.db')
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    
-    cursor.execute('SELECT * FROM giveaways')
-    rows = cursor.fetchall()
-    
+    with db.reader() as conn:
+        cursor = conn.cursor()
+
+        cursor.execute('SELECT * FROM giveaways')
+        rows = cursor.fetchall()
+
+        entries = {}
+        cursor.execute('SELECT message_id, user_id, is_winner FROM giveaway_entries ORDER BY rowid')
+        for entry_message_id, user_id, is_winner in cursor:
+            entrants, winners = entries.setdefault(entry_message_id, ([], []))
+            entrants.append(user_id)
+            if is_winner:
+                winners.append(f"<@{user_id}>")
+
     result = {}
     for row in rows:
         data = dict(row)
         message_id = data["message_id"]
-        
-        data["Entrants"] = json.loads(data.get("entrants", "[]"))
-        data["Winners"] = json.loads(data.get("winners", "[]"))
-        
+
+        if data["entries_migrated"]:
+            data["Entrants"], data["Winners"] = entries.get(message_id, ([], []))
+        else:
+            data["Entrants"] = _decode_id_list(data.get("entrants"))
+            data["Winners"] = _decode_id_list(data.get("winners"))
+
         result[message_id] = {
             "member": data.get("member", ""),
             "Title": data.get("title", ""),
@@ -219,6 +723,246 @@ def get_all_giveaways_from_db() -> dict:
             "Entrants": data.get("Entrants", []),
             "Winners": data.get("Winners", [])
         }
-    
-    conn.close()
+
     return result
+
+GIVEAWAY_COLUMNS = (
+    'message_id', 'member', 'title', 'winner', 'time', 'description', 'entries',
+    'entrants', 'winners', 'entries_migrated', 'status', 'guild_id', 'channel_id',
+    'host_id', 'image_url', 'end_timestamp', 'version'
+)
+
+# When a giveaway ended. Rows saved before end_timestamp existed fall back to
+# the time the message was posted (held in its snowflake ID, counted in ms
+# from the Discord epoch) plus the giveaway's duration in seconds
+_ENDED_AT_SQL = (
+    "COALESCE(end_timestamp, ((CAST(message_id AS INTEGER) >> 22) + 1420070400000) / 1000.0 + COALESCE(time, 0))"
+)
+
+def iter_giveaways(batch_size: int = 500, host: str = None, since: float = None,
+                   until: float = None, status: str = None, columns: Iterable[str] = None,
+                   with_entries: bool = False) -> Iterator[dict]:
+    """
+    Stream giveaways in storage order, fetching one batch per query.
+
+    Each batch is a keyset query on rowid with its own short-lived read, so
+    memory stays bounded by the batch size and no read transaction is held
+    open while the caller processes rows.
+
+    Args:
+        batch_size: Rows fetched per query
+        host: Only giveaways hosted by this user ID (or mention)
+        since: Only giveaways ending at or after this UNIX timestamp
+        until: Only giveaways ending before this UNIX timestamp; rows
+            without end_timestamp are dated by their message ID and
+            duration
+        status: Only giveaways with this status ('active' or 'ended')
+        columns: giveaways columns to return (defaults to all); message_id
+            is always included
+        with_entries: Also load "Entrants" (user IDs) and "Winners"
+            (mentions) of each giveaway
+
+    Yields:
+        Dictionary of the requested columns for each matching giveaway
+
+    Raises:
+        ValueError: If an unknown column is requested
+    """
+    selected = list(dict.fromkeys(['message_id', *(columns or GIVEAWAY_COLUMNS)]))
+    unknown = set(selected) - set(GIVEAWAY_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown giveaway columns: {sorted(unknown)}")
+    # _load_entry_ids needs these; drop them again unless they were asked for
+    helpers = [c for c in ('entries_migrated', 'entrants', 'winners') if with_entries and c not in selected]
+    selected += helpers
+
+    filters, params = [], []
+    if host is not None:
+        host_id = _mention_to_id(host)
+        filters.append('(host_id = ? OR member IN (?, ?))')
+        params += [host_id, f"<@{host_id}>", f"<@!{host_id}>"]
+    if since is not None:
+        filters.append(f'{_ENDED_AT_SQL} >= ?')
+        params.append(since)
+    if until is not None:
+        filters.append(f'{_ENDED_AT_SQL} < ?')
+        params.append(until)
+    if status is not None:
+        filters.append('status = ?')
+        params.append(status)
+
+    query = f"""
+    SELECT rowid AS cursor, {', '.join(selected)} FROM giveaways
+    WHERE rowid > ? {''.join(' AND ' + f for f in filters)}
+    ORDER BY rowid LIMIT ?
+    """
+    after = 0
+    while True:
+        with db.reader() as conn:
+            cursor = conn.cursor()
+            rows = cursor.execute(query, (after, *params, batch_size)).fetchall()
+            batch = []
+            for row in rows:
+                giveaway = dict(row)
+                if with_entries:
+                    giveaway["Entrants"], giveaway["Winners"] = _load_entry_ids(cursor, row)
+                for column in helpers:
+                    del giveaway[column]
+                batch.append(giveaway)
+
+        for giveaway in batch:
+            after = giveaway.pop("cursor")
+            yield giveaway
+        if len(rows) < batch_size:
+            return
+
+@timed_query
+def count_entries(message_id: str) -> int:
+    """
+    Count the entrants of a giveaway.
+
+    Args:
+        message_id: The Discord message ID of the giveaway
+
+    Returns:
+        int: Number of entrants
+    """
+    with db.reader() as conn:
+        row = conn.execute(
+            'SELECT COUNT(*) FROM giveaway_entries WHERE message_id = ?', (message_id,)
+        ).fetchone()
+    return row[0]
+
+@timed_query
+def has_entered(message_id: str, user_id: str) -> bool:
+    """
+    Check whether a user entered a giveaway.
+
+    Args:
+        message_id: The Discord message ID of the giveaway
+        user_id: The Discord user ID
+
+    Returns:
+        bool: True if the user is an entrant
+    """
+    with db.reader() as conn:
+        row = conn.execute(
+            'SELECT 1 FROM giveaway_entries WHERE message_id = ? AND user_id = ?',
+            (message_id, str(user_id))
+        ).fetchone()
+    return row is not None
+
+@timed_query
+def get_user_giveaways(user_id: str) -> list[str]:
+    """
+    List the giveaways a user entered.
+
+    Args:
+        user_id: The Discord user ID
+
+    Returns:
+        List of giveaway message IDs
+    """
+    with db.reader() as conn:
+        rows = conn.execute(
+            'SELECT message_id FROM giveaway_entries WHERE user_id = ?', (str(user_id),)
+        ).fetchall()
+    return [row[0] for row in rows]
+
+@timed_query
+def get_entrants_page(message_id: str, after: int = 0, limit: int = 100) -> tuple[list[dict], int | None]:
+    """
+    Fetch one page of hydrated entrants in entry order.
+
+    Args:
+        message_id: The Discord message ID of the giveaway
+        after: Cursor returned by the previous page (0 for the first page)
+        limit: Maximum number of entrants to return
+
+    Returns:
+        tuple: (entrants, next_cursor) where next_cursor is None on the last page
+    """
+    with db.reader() as conn:
+        rows = conn.execute('''
+        SELECT e.rowid AS cursor, e.user_id AS id, e.is_winner,
+               u.username, u.display_name, u.avatar, u.joined_at
+        FROM giveaway_entries e
+        LEFT JOIN users u ON u.user_id = e.user_id
+        WHERE e.message_id = ? AND e.rowid > ?
+        ORDER BY e.rowid
+        LIMIT ?
+        ''', (message_id, after, limit)).fetchall()
+
+    entrants = [dict(row) for row in rows]
+    next_cursor = entrants[-1].pop("cursor") if len(entrants) == limit else None
+    for entrant in entrants:
+        entrant.pop("cursor", None)
+    return entrants, next_cursor
+
+@timed_query
+def get_giveaway_summary(message_id: str, entrant_limit: int = 100) -> dict | None:
+    """
+    Load what the summary page renders up front, independent of entrant count.
+
+    Args:
+        message_id: The Discord message ID of the giveaway
+        entrant_limit: Size of the first page of entrants
+
+    Returns:
+        Dictionary with the giveaway fields, "Hoster", hydrated "Winners",
+        the reroll history as "Rerolls" (winners drawn by each reroll, in
+        draw order, with "user", "rerolled_by" and "rerolled_at"),
+        "EntrantCount", the first page of "Entrants" and "NextCursor",
+        or None if not found
+    """
+    with db.reader() as conn:
+        row = conn.execute(
+            'SELECT message_id, entries_migrated FROM giveaways WHERE message_id = ?', (message_id,)
+        ).fetchone()
+    if row is None:
+        return None
+    if not row["entries_migrated"]:
+        migrate_entries(message_id=message_id)
+
+    with db.reader() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT * FROM giveaways WHERE message_id = ?', (message_id,))
+        data = dict(cursor.fetchone())
+
+        cursor.execute('SELECT * FROM users WHERE user_id = ?', ((data.get("member", "")[2:-1]),))
+        hoster = cursor.fetchone()
+
+        cursor.execute(
+            'SELECT user_id FROM giveaway_entries WHERE message_id = ? AND is_winner = 1 ORDER BY rowid',
+            (message_id,)
+        )
+        winner_ids = [user_id for (user_id,) in cursor.fetchall()]
+
+        cursor.execute(
+            'SELECT user_id, rerolled_by, rerolled_at FROM giveaway_rerolls WHERE message_id = ? ORDER BY rowid',
+            (message_id,)
+        )
+        rerolls = [dict(row) for row in cursor.fetchall()]
+        users = _fetch_users(cursor, winner_ids + [reroll["user_id"] for reroll in rerolls])
+
+        cursor.execute('SELECT COUNT(*) FROM giveaway_entries WHERE message_id = ?', (message_id,))
+        entrant_count = cursor.fetchone()[0]
+
+    entrants, next_cursor = get_entrants_page(message_id, 0, entrant_limit)
+    return {
+        "member": data.get("member", ""),
+        "Title": data.get("title", ""),
+        "Winner": data.get("winner", ""),
+        "Time": data.get("time", 0),
+        "Description": data.get("description", ""),
+        "Status": data.get("status"),
+        "Hoster": hoster,
+        "Winners": [users.get(user_id, {"user_id": user_id}) for user_id in winner_ids],
+        "Rerolls": [
+            {**reroll, "user": users.get(reroll["user_id"], {"user_id": reroll["user_id"]})}
+            for reroll in rerolls
+        ],
+        "EntrantCount": entrant_count,
+        "Entrants": entrants,
+        "NextCursor": next_cursor
+    }
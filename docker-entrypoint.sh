@@ -0,0 +1,27 @@
+#!/bin/bash
+# Runs the web app and the bot side by side as the container's main process.
+# Docker sends SIGTERM only to PID 1, so it is forwarded to both: gunicorn
+# drains in-flight requests and runs worker_exit, and cluster.py stops its
+# workers. If either process exits, the other is stopped too so the
+# container restarts as a whole.
+
+gunicorn -c gunicorn.conf.py app:app &
+web=$!
+python cluster.py &
+bot=$!
+
+stop() {
+    kill -TERM "$web" "$bot" 2>/dev/null
+}
+trap stop TERM INT
+
+# Returns when either process exits or a signal arrives
+wait -n
+status=$?
+stop
+
+# wait is interrupted by trapped signals, so keep waiting until both are gone
+while kill -0 "$web" 2>/dev/null || kill -0 "$bot" 2>/dev/null; do
+    wait
+done
+exit "$status"
@@ -0,0 +1,90 @@
+import os
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+import discord
+
+from metrics import rate_limit_hits
+
+
+class EmbedUpdater:
+    """
+    Per-giveaway scheduler that coalesces embed edits.
+
+    Every entry or leave calls `request()`, which only marks the embed dirty.
+    A single background task performs at most one edit per window, so any
+    number of count changes inside the window cost one REST call. When Discord
+    answers with a 429 the window doubles (up to `max_window`, but never
+    below the retry delay); each edit that went through without one halves it back
+    toward the base window. discord.py retries short rate limits itself, so
+    those are seen through the REST trace (metrics.rate_limit_hits) rather
+    than as exceptions.
+    """
+
+    def __init__(self, flush: Callable[[], Awaitable[None]],
+                 window: float = None, max_window: float = None):
+        """
+        Initialize the updater.
+
+        Args:
+            flush: Coroutine function that performs the actual message edit
+            window: Base coalescing window in seconds
+                (defaults to EMBED_UPDATE_WINDOW or 2 seconds)
+            max_window: Upper bound for the window under backoff
+                (defaults to EMBED_UPDATE_MAX_WINDOW or 60 seconds)
+        """
+        self._flush = flush
+        self.base_window = window if window is not None else float(os.getenv('EMBED_UPDATE_WINDOW', '2'))
+        self.max_window = max_window if max_window is not None else float(os.getenv('EMBED_UPDATE_MAX_WINDOW', '60'))
+        self.window = self.base_window
+        self._dirty = False
+        self._task = None
+
+    def request(self) -> None:
+        """Mark the embed as stale and make sure a flush is scheduled."""
+        self._dirty = True
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def cancel(self) -> None:
+        """Drop any pending edit, e.g. because the giveaway has ended."""
+        self._dirty = False
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self._task = None
+
+    async def _run(self):
+        """Flush once per window for as long as new changes keep arriving."""
+        while self._dirty:
+            await asyncio.sleep(self.window)
+            self._dirty = False
+            hits = []
+            token = rate_limit_hits.set(hits)
+            try:
+                await self._flush()
+            except discord.RateLimited as e:
+                # Raised instead of sleeping when the wait exceeds max_ratelimit_timeout
+                self._dirty = True
+                self._back_off(e.retry_after)
+            except discord.HTTPException as e:
+                if e.status != 429:
+                    logging.error(f"Error updating giveaway message: {e}")
+                    continue
+                self._dirty = True
+                self._back_off(max(hits, default=0))
+            except Exception as e:
+                logging.error(f"Error updating giveaway message: {e}")
+            else:
+                if hits:
+                    # discord.py waited out the 429 and the edit went through
+                    self._back_off(max(hits))
+                else:
+                    self.window = max(self.base_window, self.window / 2)
+            finally:
+                rate_limit_hits.reset(token)
+
+    def _back_off(self, retry_after: float) -> None:
+        # Never retry before Discord allows it, even past max_window
+        self.window = max(min(self.window * 2, self.max_window), retry_after)
+        logging.warning(f"Rate limited updating giveaway message, window now {self.window:.1f}s")
@@ -0,0 +1,260 @@
+import os
+import math
+import heapq
+import random
+from array import array
+from typing import Iterable, Iterator, Sequence
+
+_HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+_UINT64_MASK = 0xFFFFFFFFFFFFFFFF
+_MIN_CAPACITY_BITS = 3
+
+_EMPTY = 0
+_DELETED = -1
+
+def _parse_bonus_roles(value: str) -> dict[int, float]:
+    """Parse BONUS_ROLES, a comma-separated list of role_id:weight pairs."""
+    bonus = {}
+    for item in value.split(','):
+        if ':' in item:
+            role_id, weight = item.split(':', 1)
+            bonus[int(role_id)] = float(weight)
+    return bonus
+
+BOOSTER_WEIGHT = float(os.getenv('BOOSTER_WEIGHT', '1'))
+BONUS_ROLES = _parse_bonus_roles(os.getenv('BONUS_ROLES', ''))
+
+def entry_weight(member: object) -> float:
+    """
+    Number of tickets an entrant gets: the best of their bonuses, at least 1.
+
+    Args:
+        member: The entering user; bonuses only apply to guild members
+
+    Returns:
+        float: The entry weight
+    """
+    weight = 1.0
+    if getattr(member, 'premium_since', None) is not None:
+        weight = max(weight, BOOSTER_WEIGHT)
+    for role in getattr(member, 'roles', ()):
+        weight = max(weight, BONUS_ROLES.get(role.id, weight))
+    return weight
+
+def weighted_sample(items: Sequence, weights: Sequence[float], k: int) -> list:
+    """
+    Draw k distinct items with probability proportional to their weights.
+
+    Uses Efraimidis-Spirakis exponential keys (log(u) / w, largest k win)
+    selected with a size-k heap, in O(n log k) time and O(k) extra memory.
+
+    Args:
+        items: Candidates
+        weights: Positive weight of each candidate
+        k: Number of items to draw
+
+    Returns:
+        list: The drawn items
+    """
+    rand, log = random.random, math.log
+    keys = ((log(1.0 - rand()) / weight, item) for item, weight in zip(items, weights))
+    return [item for _, item in heapq.nlargest(k, keys, key=lambda pair: pair[0])]
+
+
+class EntrantRegistry:
+    """
+    Insertion-ordered set of Discord user IDs.
+
+    IDs are kept in a packed int64 array in the order users entered, and an
+    open-addressing hash index (int32 positions into that array) gives O(1)
+    membership, add and remove without boxing every ID in a Python object.
+    Removed entrants leave a tombstone that is compacted away once they make
+    up half of the array. Each entrant carries a weight (their number of
+    tickets) in a parallel float32 array, so bonus entries never duplicate IDs.
+    """
+
+    __slots__ = ("_ids", "_weights", "_tiers", "_slots", "_bits", "_size", "_used")
+
+    def __init__(self, user_ids: Iterable[int] = (), weights: Iterable[float] = None):
+        """
+        Initialize the registry.
+
+        Args:
+            user_ids: Optional initial user IDs, added in iteration order
+            weights: Optional weight of each initial user ID (defaults to 1)
+        """
+        self._ids = array('q')
+        self._weights = array('f')
+        self._tiers = {}
+        self._size = 0
+        self._allocate(_MIN_CAPACITY_BITS)
+        if weights is None:
+            for user_id in user_ids:
+                self.add(user_id)
+        else:
+            for user_id, weight in zip(user_ids, weights):
+                self.add(user_id, weight)
+
+    def _allocate(self, bits: int) -> None:
+        """Reset the hash index to an empty table of 2**bits slots."""
+        self._bits = bits
+        self._slots = array('i', bytes(4 << bits))
+        self._used = 0
+
+    def _home(self, user_id: int) -> int:
+        """Fibonacci-hash a user ID to its home slot."""
+        return ((user_id * _HASH_MULTIPLIER) & _UINT64_MASK) >> (64 - self._bits)
+
+    def _find(self, user_id: int) -> tuple[int, int]:
+        """
+        Locate a user ID in the hash index.
+
+        Returns:
+            tuple: (slot, position) where position is the index into the ID
+            array, or -1 if absent, in which case slot is where it would go
+        """
+        slots, ids = self._slots, self._ids
+        mask = (1 << self._bits) - 1
+        index = self._home(user_id)
+        free = -1
+        while True:
+            slot = slots[index]
+            if slot == _EMPTY:
+                return (index if free < 0 else free), -1
+            if slot == _DELETED:
+                if free < 0:
+                    free = index
+            elif ids[slot - 1] == user_id:
+                return index, slot - 1
+            index = (index + 1) & mask
+
+    def _rebuild(self) -> None:
+        """Compact out removed entrants and rehash into a right-sized index."""
+        ids, weights = array('q'), array('f')
+        for user_id, weight in zip(self._ids, self._weights):
+            if user_id:
+                ids.append(user_id)
+                weights.append(weight)
+        self._weights = weights
+        bits = _MIN_CAPACITY_BITS
+        while (1 << bits) < len(ids) * 2:
+            bits += 1
+        self._ids = ids
+        self._allocate(bits)
+        slots = self._slots
+        mask = (1 << bits) - 1
+        for position, user_id in enumerate(ids, start=1):
+            index = self._home(user_id)
+            while slots[index] != _EMPTY:
+                index = (index + 1) & mask
+            slots[index] = position
+        self._used = len(ids)
+
+    def add(self, user_id: int, weight: float = 1.0) -> bool:
+        """
+        Register an entrant.
+
+        Args:
+            user_id: The Discord user ID
+            weight: Positive number of tickets the entrant holds
+
+        Returns:
+            bool: True if the user was added, False if already present
+        """
+        slot, position = self._find(user_id)
+        if position >= 0:
+            return False
+        if self._slots[slot] == _EMPTY:
+            self._used += 1
+        self._ids.append(user_id)
+        self._weights.append(weight)
+        weight = self._weights[-1]
+        self._tiers[weight] = self._tiers.get(weight, 0) + 1
+        self._slots[slot] = len(self._ids)
+        self._size += 1
+        if self._used * 3 > (2 << self._bits):
+            self._rebuild()
+        return True
+
+    def discard(self, user_id: int) -> bool:
+        """
+        Remove an entrant if present.
+
+        Args:
+            user_id: The Discord user ID
+
+        Returns:
+            bool: True if the user was removed, False if they had not entered
+        """
+        slot, position = self._find(user_id)
+        if position < 0:
+            return False
+        self._slots[slot] = _DELETED
+        self._ids[position] = 0
+        weight = self._weights[position]
+        self._tiers[weight] -= 1
+        if not self._tiers[weight]:
+            del self._tiers[weight]
+        self._size -= 1
+        if len(self._ids) > 2 * self._size + 8:
+            self._rebuild()
+        return True
+
+    def sample(self, k: int) -> list[int]:
+        """
+        Draw k distinct entrants, each with probability proportional to weight.
+
+        With equal weights this is a plain uniform sample. Otherwise each
+        winner is found by rejection: a uniformly random position is accepted
+        with probability weight / max weight, which takes O(max / mean weight)
+        expected tries and no setup. Draws of more than half the entrants,
+        where repeats would make rejection slow, use weighted_sample instead.
+
+        Args:
+            k: Number of entrants to draw
+
+        Returns:
+            list: The drawn user IDs
+        """
+        if len(self._ids) != self._size:
+            self._rebuild()
+        if len(self._tiers) <= 1:
+            return random.sample(self._ids, k)
+
+        ids, weights = self._ids, self._weights
+        if k * 2 > len(ids):
+            return weighted_sample(ids, weights, k)
+
+        top = max(self._tiers)
+        randrange, rand = random.randrange, random.random
+        chosen = set()
+        winners = []
+        while len(winners) < k:
+            position = randrange(len(ids))
+            if position not in chosen and rand() * top < weights[position]:
+                chosen.add(position)
+                winners.append(ids[position])
+        return winners
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the ID, weight and hash index buffers."""
+        return (self._ids.buffer_info()[1] * self._ids.itemsize
+                + self._weights.buffer_info()[1] * self._weights.itemsize
+                + self._slots.buffer_info()[1] * self._slots.itemsize)
+
+    def __contains__(self, user_id: object) -> bool:
+        if not isinstance(user_id, int):
+            return False
+        return self._find(user_id)[1] >= 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[int]:
+        for user_id in self._ids:
+            if user_id:
+                yield user_id
+
+    def __repr__(self) -> str:
+        return f"<EntrantRegistry size={self._size}>"
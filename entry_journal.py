@@ -0,0 +1,90 @@
+import os
+import time
+import asyncio
+import logging
+
+from async_db import apply_entry_events
+
+class EntryJournal:
+    """
+    Write-behind journal of giveaway joins and leaves.
+
+    Events are buffered in memory and written to giveaway_entries in one
+    batched transaction once `max_events` have accumulated or `interval`
+    seconds after the first buffered event, whichever comes first. Entries
+    therefore survive a crash or redeploy mid-giveaway, and the write load is
+    spread over the giveaway's lifetime instead of landing at the draw.
+    """
+
+    def __init__(self, max_events: int = None, interval: float = None):
+        """
+        Initialize the journal.
+
+        Args:
+            max_events: Buffered events that trigger an immediate flush
+                (defaults to JOURNAL_MAX_EVENTS or 500)
+            interval: Seconds before buffered events are flushed
+                (defaults to JOURNAL_FLUSH_MS or 1000 milliseconds)
+        """
+        self.max_events = max_events or int(os.getenv('JOURNAL_MAX_EVENTS', '500'))
+        self.interval = interval if interval is not None else int(os.getenv('JOURNAL_FLUSH_MS', '1000')) / 1000
+        self._events = []
+        self._timer = None
+        self._flush_queued = False
+        self._tasks = set()
+        self._lock = asyncio.Lock()
+
+    def record_join(self, message_id: str, user_id: int, weight: float = 1.0) -> None:
+        """Buffer a user entering a giveaway with the given entry weight."""
+        self._record(message_id, user_id, True, weight)
+
+    def record_leave(self, message_id: str, user_id: int) -> None:
+        """Buffer a user leaving a giveaway."""
+        self._record(message_id, user_id, False, 0.0)
+
+    def _record(self, message_id: str, user_id: int, joined: bool, weight: float) -> None:
+        self._events.append((str(message_id), str(user_id), time.time(), joined, weight))
+        if self._flush_queued:
+            return
+        if len(self._events) >= self.max_events:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._spawn_flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.interval, self._spawn_flush)
+
+    def _spawn_flush(self) -> None:
+        self._timer = None
+        self._flush_queued = True
+        task = asyncio.create_task(self.flush())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def flush(self) -> None:
+        """
+        Write all buffered events in one transaction.
+
+        Flushes are serialized so events reach the database in the order they
+        were recorded. On failure the events are put back and retried after
+        `interval`.
+        """
+        async with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+            self._flush_queued = False
+            events, self._events = self._events, []
+            if not events:
+                return
+
+            try:
+                await apply_entry_events(events)
+            except Exception as e:
+                logging.error(f"Error flushing entry journal: {e}")
+                self._events[:0] = events
+                # Retry even if no further joins or leaves arrive to arm the timer
+                if self._timer is None and not self._flush_queued:
+                    self._timer = asyncio.get_running_loop().call_later(self.interval, self._spawn_flush)
+
+journal = EntryJournal()
@@ -0,0 +1,48 @@
+import os
+import shutil
+import tempfile
+import multiprocessing
+
+# Production settings for the summary web app: `gunicorn -c gunicorn.conf.py app:app`
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv('WEB_WORKERS', str(multiprocessing.cpu_count() * 2 + 1)))
+worker_class = 'gthread'
+threads = int(os.getenv('WEB_THREADS', '4'))
+keepalive = int(os.getenv('WEB_KEEPALIVE', '5'))
+timeout = int(os.getenv('WEB_TIMEOUT', '30'))
+graceful_timeout = int(os.getenv('WEB_GRACEFUL_TIMEOUT', '30'))
+
+# Recycle workers now and then so a slow leak cannot grow without bound
+max_requests = int(os.getenv('WEB_MAX_REQUESTS', '10000'))
+max_requests_jitter = max_requests // 10
+
+accesslog = os.getenv('WEB_ACCESS_LOG') or None
+errorlog = '-'
+
+# Workers each keep their own metrics and write them here; /metrics sums them
+os.environ.setdefault('WEB_METRICS_DIR', os.path.join(tempfile.gettempdir(), 'giftmaster-web-metrics'))
+
+def on_starting(server):
+    """Drop the metrics snapshots of a previous run."""
+    metrics_dir = os.environ['WEB_METRICS_DIR']
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir)
+
+def post_worker_init(worker):
+    """Set up logging and metrics, compile templates and open one reader connection per thread."""
+    from app import warm_worker
+    from logging_setup import setup_logging
+    import metrics
+    # Workers log to stderr, which the arbiter collects; rotating one file
+    # from several worker processes is not safe
+    setup_logging()
+    metrics.export_snapshots(os.environ['WEB_METRICS_DIR'])
+    warm_worker(worker.cfg.threads)
+
+def worker_exit(server, worker):
+    """Close the worker's SQLite connections and write its final metrics once in-flight requests finish."""
+    from database import db
+    import metrics
+    db.close()
+    metrics.write_snapshot(os.environ['WEB_METRICS_DIR'])
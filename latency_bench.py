@@ -0,0 +1,71 @@
+import os
+import time
+import argparse
+import statistics
+
+from loadtest import stand_in_giveaway
+
+def fetch_users_per_user(cursor, user_ids: list) -> dict:
+    """The old hydration: one users query per ID."""
+    users = {}
+    for user_id in dict.fromkeys(str(user_id) for user_id in user_ids):
+        cursor.execute('SELECT * FROM users WHERE user_id = ?', (user_id,))
+        row = cursor.fetchone()
+        if row is not None:
+            users[row["user_id"]] = dict(row)
+    return users
+
+def median_ms(func, repeat: int) -> float:
+    """Median run time of `func()` over `repeat` runs, in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+def run(entrant_counts: list[int], repeat: int) -> None:
+    import db_operations
+    from app import app, render_summary
+    from static_export import ENTRANTS_PAGE_SIZE
+
+    db_operations.init_db()
+
+    def page(message_id):
+        # What the web app does on a render cache miss
+        with app.test_request_context():
+            render_summary(db_operations.get_giveaway_summary(message_id, ENTRANTS_PAGE_SIZE), message_id)
+
+    print(f"{'entrants':>9} {'full load':>10} {'page':>8} {'reroll':>8}")
+    for g, entrants in enumerate(entrant_counts):
+        message_id = str(910000000000000000 + g)
+        db_operations.save_giveaway_to_db(message_id, stand_in_giveaway(entrants, f"Latency prize {g}"))
+        # Reads the entrants back once so the legacy migration is not timed
+        db_operations.get_giveaway_from_db(message_id)
+
+        full = median_ms(lambda: db_operations.get_giveaway_from_db(message_id), repeat)
+        summary = median_ms(lambda: page(message_id), repeat)
+        # Each run draws one more winner; entrant counts dwarf `repeat`
+        reroll = median_ms(lambda: db_operations.reroll_winners(message_id, 1), repeat)
+        print(f"{entrants:>9} {full:>8.1f}ms {summary:>6.1f}ms {reroll:>6.1f}ms")
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure giveaway load, summary page and reroll latency against entrant count."
+    )
+    parser.add_argument('--entrants', type=int, nargs='+', default=[100, 1000, 10000, 50000])
+    parser.add_argument('--repeat', type=int, default=5, help="Runs per measurement; the median is shown")
+    parser.add_argument('--per-user', action='store_true',
+                        help="Hydrate users with one query each instead, for comparison")
+    args = parser.parse_args()
+
+    if args.per_user:
+        import db_operations
+        db_operations._fetch_users = fetch_users_per_user
+
+    print(f"database:  {os.getenv('DATABASE_PATH', './Database/giveaways.db')}")
+    print(f"hydration: {'one query per user' if args.per_user else 'chunked IN batches'}")
+    run(args.entrants, args.repeat)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+import os
+import time
+import random
+import argparse
+import threading
+import http.client
+from urllib.parse import urlsplit
+
+def stand_in_giveaway(entrants: int, title: str = "Stand-in prize") -> dict:
+    """A stand-in ended giveaway with `entrants` full user profiles."""
+    users = [{
+        "id": str(100000000000000000 + i),
+        "username": f"user{i}",
+        "display_name": f"User {i}",
+        "discriminator": "0",
+        "avatar": None,
+        "created_at": "2024-01-01 00:00:00",
+        "joined_at": "2024-01-01 00:00:00"
+    } for i in range(entrants)]
+    return {
+        "member": "<@100000000000000000>",
+        "Title": title,
+        "Winner": "1",
+        "Time": 3600,
+        "Description": "Stand-in giveaway",
+        "Entries": entrants,
+        "Entrants": users,
+        "Winners": ["<@100000000000000001>"]
+    }
+
+def seed(giveaways: int, entrants: int) -> list[str]:
+    """
+    Fill the database at DATABASE_PATH with stand-in ended giveaways.
+
+    Args:
+        giveaways: Number of giveaways to create
+        entrants: Entrants per giveaway
+
+    Returns:
+        list[str]: Message IDs of the created giveaways
+    """
+    from db_operations import init_db, save_giveaway_to_db
+
+    init_db()
+    message_ids = []
+    for g in range(giveaways):
+        message_id = str(900000000000000000 + g)
+        save_giveaway_to_db(message_id, stand_in_giveaway(entrants, f"Load test prize {g}"))
+        message_ids.append(message_id)
+    return message_ids
+
+def run(base_url: str, paths: list[str], concurrency: int, duration: float) -> list[float]:
+    """
+    Request random paths from keep-alive connections for a fixed time.
+
+    Returns:
+        list[float]: Latency of every successful request, in seconds
+    """
+    url = urlsplit(base_url)
+    deadline = time.perf_counter() + duration
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def client():
+        conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=30)
+        local, failed = [], 0
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                conn.request('GET', random.choice(paths))
+                response = conn.getresponse()
+                response.read()
+                if response.status != 200:
+                    failed += 1
+                    continue
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                conn.close()
+                continue
+            local.append(time.perf_counter() - start)
+        conn.close()
+        with lock:
+            latencies.extend(local)
+            errors.append(failed)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(f"errors: {sum(errors)}")
+    return latencies
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the giveaway summary web app.")
+    parser.add_argument('url', nargs='?', default='http://127.0.0.1:5000')
+    parser.add_argument('--seed', action='store_true',
+                        help="Create stand-in giveaways in DATABASE_PATH and exit")
+    parser.add_argument('--giveaways', type=int, default=50)
+    parser.add_argument('--entrants', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=20)
+    args = parser.parse_args()
+
+    if args.seed:
+        seed(args.giveaways, args.entrants)
+        print(f"Seeded {args.giveaways} giveaways into {os.getenv('DATABASE_PATH', './Database/giveaways.db')}")
+        return
+
+    ids = [str(900000000000000000 + g) for g in range(args.giveaways)]
+    paths = [f"/{i}" for i in ids] + [f"/api/{i}/entrants?cursor=100" for i in ids]
+    latencies = sorted(run(args.url, paths, args.concurrency, args.duration))
+    if not latencies:
+        print("No successful requests")
+        return
+
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+    print(f"requests: {len(latencies)}")
+    print(f"req/s:    {len(latencies) / args.duration:.0f}")
+    print(f"p50:      {pct(0.50):.1f} ms")
+    print(f"p99:      {pct(0.99):.1f} ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+import os
+import sys
+import json
+import queue
+import atexit
+import logging
+import logging.handlers
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Records waiting for the listener thread; beyond this they are dropped
+# rather than blocking the caller
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+
+_listener = None
+
+class JsonFormatter(logging.Formatter):
+    """Formats each record as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'process': record.process,
+            'message': record.getMessage()
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry)
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler that never waits for the queue.
+
+    If the listener falls behind (e.g. a stalled disk) and the queue is
+    full, records are counted in `dropped` and discarded.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The queue never leaves the process, so only merge the arguments
+        # (they may change later) and leave formatting to the listener
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+def _file_handler(log_file: str) -> logging.Handler:
+    """Rotate by time if LOG_ROTATE_WHEN is set (e.g. 'midnight'), otherwise by size."""
+    backups = int(os.getenv('LOG_BACKUPS', '5'))
+    when = os.getenv('LOG_ROTATE_WHEN')
+    if when:
+        return logging.handlers.TimedRotatingFileHandler(log_file, when=when, backupCount=backups, encoding='utf-8')
+    max_bytes = int(os.getenv('LOG_MAX_BYTES', str(10 * 1024 * 1024)))
+    return logging.handlers.RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backups, encoding='utf-8')
+
+def setup_logging(log_file: str = None) -> DroppingQueueHandler:
+    """
+    Route the root logger through a queue to a background writer thread.
+
+    Log calls only put the record on a queue; formatting, console output
+    and the rotating file are handled by a QueueListener thread. Every
+    process should log to its own file, as rotation is not safe across
+    processes. Calling it again in the same process has no effect.
+
+    LOG_LEVEL sets the level (default INFO) and LOG_JSON=1 writes one JSON
+    object per line instead of plain text.
+
+    Args:
+        log_file: File to write besides the console, or None for console only
+
+    Returns:
+        DroppingQueueHandler: The handler installed on the root logger
+    """
+    global _listener
+    root = logging.getLogger()
+    if _listener is not None:
+        return next(h for h in root.handlers if isinstance(h, DroppingQueueHandler))
+
+    if os.getenv('LOG_JSON') == '1':
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(LOG_FORMAT)
+
+    handlers = [logging.StreamHandler(sys.stderr)]
+    if log_file:
+        handlers.append(_file_handler(log_file))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.Queue(LOG_QUEUE_SIZE)
+    queue_handler = DroppingQueueHandler(log_queue)
+    root.handlers = [queue_handler]
+    root.setLevel(os.getenv('LOG_LEVEL', 'INFO').upper())
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    # Flush what is still queued when the process exits
+    atexit.register(_listener.stop)
+    return queue_handler
@@ -0,0 +1,74 @@
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+from loadtest import stand_in_giveaway
+
+async def measure(save, message_id: str, data: dict, tick: float) -> tuple[float, float, int]:
+    """
+    Run a ticker on the event loop while `save` runs.
+
+    Returns:
+        tuple: (save seconds, max lag in seconds, ticks observed)
+    """
+    loop = asyncio.get_running_loop()
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            start = loop.time()
+            await asyncio.sleep(tick)
+            lags.append(loop.time() - start - tick)
+
+    task = asyncio.create_task(ticker())
+    # Let the ticker settle before the save starts
+    await asyncio.sleep(tick * 4)
+    start = time.perf_counter()
+    await save(message_id, data)
+    elapsed = time.perf_counter() - start
+    done.set()
+    await task
+    return elapsed, max(lags), len(lags)
+
+async def run(entrants: int, tick: float, blocking: bool) -> float:
+    import db_operations
+    from async_db import init_db, save_giveaway_to_db
+
+    await init_db()
+    data = stand_in_giveaway(entrants, "Loop lag prize")
+
+    if blocking:
+        # The old call path: the save runs on the event loop itself
+        async def save(message_id, data):
+            db_operations.save_giveaway_to_db(message_id, data)
+    else:
+        save = save_giveaway_to_db
+
+    elapsed, max_lag, ticks = await measure(save, '900000000000000000', data, tick)
+    print(f"entrants:  {entrants}")
+    print(f"save:      {elapsed * 1000:.0f} ms ({'on the loop' if blocking else 'DB thread'})")
+    print(f"ticks:     {ticks} at {tick * 1000:.0f} ms")
+    print(f"max lag:   {max_lag * 1000:.1f} ms")
+    return max_lag
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure event loop lag while a large giveaway is saved.")
+    parser.add_argument('--entrants', type=int, default=100000)
+    parser.add_argument('--tick-ms', type=float, default=5)
+    parser.add_argument('--max-lag-ms', type=float, default=50,
+                        help="Exit with status 1 if the max lag exceeds this")
+    parser.add_argument('--blocking', action='store_true',
+                        help="Save on the event loop instead, for comparison")
+    args = parser.parse_args()
+
+    print(f"database:  {os.getenv('DATABASE_PATH', './Database/giveaways.db')}")
+    max_lag = asyncio.run(run(args.entrants, args.tick_ms / 1000, args.blocking))
+    if max_lag * 1000 > args.max_lag_ms:
+        print(f"FAIL: max lag above {args.max_lag_ms:.0f} ms")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
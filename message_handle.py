@@ -0,0 +1,73 @@
+import logging
+from collections import Counter
+
+import discord
+from discord.ext import commands
+
+# REST calls made through every handle since startup, by kind
+rest_totals = Counter()
+
+class MessageHandle:
+    """
+    Edits a message by channel and message ID without fetching it first.
+
+    The handle wraps a partial message, so each edit is a single PATCH. A
+    deleted message is detected from the edit's own NotFound response and
+    remembered, after which edits return immediately without a request.
+    REST calls are counted per handle for the lifetime of the giveaway.
+    """
+
+    def __init__(self, bot: commands.Bot, channel_id: int, message_id: int, guild_id: int = None):
+        """
+        Initialize the handle.
+
+        Args:
+            bot: The bot instance
+            channel_id: ID of the channel holding the message
+            message_id: ID of the message
+            guild_id: ID of the guild, if any (used for jump URLs)
+        """
+        channel = bot.get_partial_messageable(channel_id, guild_id=guild_id)
+        self.message = channel.get_partial_message(message_id)
+        self.deleted = False
+        self.rest_calls = Counter()
+
+    @classmethod
+    def for_message(cls, bot: commands.Bot, message: discord.Message | discord.PartialMessage) -> 'MessageHandle':
+        """Build a handle from a sent or partial message."""
+        guild = message.guild
+        return cls(bot, message.channel.id, message.id, guild.id if guild else None)
+
+    def _count(self, kind: str) -> None:
+        self.rest_calls[kind] += 1
+        rest_totals[kind] += 1
+
+    async def edit(self, **fields) -> bool:
+        """
+        Edit the message.
+
+        Args:
+            **fields: Keyword arguments for discord.PartialMessage.edit
+
+        Returns:
+            bool: True if the message was edited, False if it was deleted
+
+        Raises:
+            discord.HTTPException: For failures other than the message being
+                gone, e.g. rate limits, so callers can back off
+        """
+        if self.deleted:
+            return False
+        self._count('edit')
+        try:
+            await self.message.edit(**fields)
+        except discord.NotFound:
+            logging.warning(f"Message {self.message.id} was deleted")
+            self.deleted = True
+            return False
+        return True
+
+    @property
+    def total_calls(self) -> int:
+        """REST calls made through this handle."""
+        return sum(self.rest_calls.values())
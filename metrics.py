@@ -0,0 +1,386 @@
+import os
+import time
+import asyncio
+import json
+import bisect
+import logging
+import functools
+import threading
+from abc import ABC, abstractmethod
+from contextvars import ContextVar
+from typing import Callable
+
+import aiohttp
+
+# Latency buckets in seconds, from a cached read to a slow REST round trip
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# How often the event loop lag is sampled, in seconds
+LOOP_LAG_INTERVAL = float(os.getenv('LOOP_LAG_INTERVAL', '0.5'))
+
+# How often processes sharing a scrape target write their snapshot, in seconds
+SNAPSHOT_INTERVAL = float(os.getenv('METRICS_SNAPSHOT_INTERVAL', '5'))
+
+_registry = []
+
+# Set to a list by code that wants to see the 429s discord.py retried for it;
+# the REST trace appends each one's retry delay. Trace callbacks run in the
+# task making the request, so only that caller's requests are collected.
+rate_limit_hits: ContextVar[list | None] = ContextVar('rate_limit_hits', default=None)
+
+def _format_labels(labelnames: tuple, values: tuple, extra: str = '') -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric(ABC):
+    """Base for metrics that keep one child per combination of label values."""
+
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def labels(self, **labels):
+        """Return the child for these label values, creating it on first use."""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    @abstractmethod
+    def _new_child(self):
+        """A child holding the value for one combination of label values."""
+
+    @abstractmethod
+    def _read(self, child):
+        """The child's current value as JSON-serializable data."""
+
+    @abstractmethod
+    def _add(self, total, value):
+        """Two values returned by `_read` combined, e.g. from two processes."""
+
+    @abstractmethod
+    def _lines(self, key: tuple, value) -> list[str]:
+        """The sample lines of one value returned by `_read`."""
+
+    def values(self) -> dict:
+        """The current value of every child, keyed by label values."""
+        return {key: self._read(child) for key, child in list(self._children.items())}
+
+    def render(self, values: dict = None) -> list[str]:
+        """Render this process's values, or `values` merged from several."""
+        if values is None:
+            values = self.values()
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}"
+        ]
+        for key, value in values.items():
+            lines.extend(self._lines(key, value))
+        return lines
+
+class _Value:
+    __slots__ = ('value', '_lock')
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+class Counter(_Metric):
+    """A value that only goes up, e.g. requests made."""
+
+    kind = 'counter'
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        self.labels(**labels).inc(amount)
+
+    def _read(self, child: _Value) -> float:
+        return child.value
+
+    def _add(self, total: float, value: float) -> float:
+        return total + value
+
+    def _lines(self, key: tuple, value: float) -> list[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+class Gauge(_Metric):
+    """
+    A value that goes up and down.
+
+    Either set it directly, or pass `func` to read the current value at
+    scrape time so the hot path never touches the gauge. Merged across
+    processes, the values are summed.
+    """
+
+    kind = 'gauge'
+
+    def __init__(self, name: str, documentation: str, func: Callable[[], float] = None):
+        super().__init__(name, documentation)
+        self.func = func
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+    def _read(self, child: _Value) -> float:
+        return child.value
+
+    def _add(self, total: float, value: float) -> float:
+        return total + value
+
+    def _lines(self, key: tuple, value: float) -> list[str]:
+        return [f"{self.name} {_format_value(value)}"]
+
+    def values(self) -> dict:
+        if self.func is None:
+            return super().values()
+        try:
+            return {(): self.func()}
+        except Exception as e:
+            logging.warning(f"Could not read gauge {self.name}: {e}")
+            return {}
+
+class _HistogramChild:
+    __slots__ = ('buckets', 'counts', 'sum', '_lock')
+
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        # One slot per bucket plus +Inf; made cumulative when rendered
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+class Histogram(_Metric):
+    """Counts observations, e.g. latencies, into fixed buckets."""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float, **labels) -> None:
+        self.labels(**labels).observe(value)
+
+    def _read(self, child: _HistogramChild) -> list:
+        with child._lock:
+            return [list(child.counts), child.sum]
+
+    def _add(self, total: list, value: list) -> list:
+        return [[a + b for a, b in zip(total[0], value[0])], total[1] + value[1]]
+
+    def _lines(self, key: tuple, value: list) -> list[str]:
+        counts, total = value
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += count
+            le = f'le="{_format_value(float(bound))}"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+        lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+        lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+def timed(histogram: Histogram, **labels) -> Callable:
+    """
+    Decorate a function or coroutine function to observe its run time.
+
+    The child is resolved once here, so each call only costs two clock
+    reads and one observe.
+    """
+    child = histogram.labels(**labels)
+
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    child.observe(time.perf_counter() - start)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                child.observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+HANDLER_SECONDS = Histogram(
+    'giftmaster_handler_seconds', "Time spent handling an interaction", ('handler',)
+)
+DB_QUERY_SECONDS = Histogram(
+    'giftmaster_db_query_seconds', "Time spent in a db_operations call", ('query',)
+)
+REST_REQUESTS = Counter(
+    'giftmaster_rest_requests_total', "Discord REST requests by method and status", ('method', 'status')
+)
+REST_RATE_LIMITS = Counter(
+    'giftmaster_rest_rate_limited_total', "Discord REST responses with status 429", ('scope',)
+)
+LOOP_LAG_SECONDS = Histogram(
+    'giftmaster_event_loop_lag_seconds', "How late the event loop woke a sleeping task",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+)
+
+def timed_query(func: Callable) -> Callable:
+    """Observe a db_operations function in DB_QUERY_SECONDS under its own name."""
+    return timed(DB_QUERY_SECONDS, query=func.__name__)(func)
+
+def render() -> str:
+    """Every registered metric in the Prometheus text format."""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+def write_snapshot(directory: str) -> None:
+    """
+    Write this process's values to `directory` for render_snapshots.
+
+    Each process writes its own file, named after its PID, and replaces it
+    atomically so a reader never sees a partial file.
+    """
+    data = {metric.name: [[list(key), value] for key, value in metric.values().items()] for metric in _registry}
+    path = os.path.join(directory, f'{os.getpid()}.json')
+    with open(path + '.tmp', 'w') as f:
+        json.dump(data, f)
+    os.replace(path + '.tmp', path)
+
+def render_snapshots(directory: str) -> str:
+    """
+    Every registered metric summed over the snapshots in `directory`.
+
+    Used where several processes serve the same scrape target, e.g.
+    gunicorn workers: the snapshots of exited workers are kept so their
+    counts are not lost when a worker is recycled.
+    """
+    write_snapshot(directory)
+    metrics = {metric.name: metric for metric in _registry}
+    merged = {name: {} for name in metrics}
+    for filename in os.listdir(directory):
+        if not filename.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(directory, filename)) as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Could not read metrics snapshot {filename}: {e}")
+            continue
+        for name, entries in data.items():
+            metric = metrics.get(name)
+            if metric is None:
+                continue
+            values = merged[name]
+            for key, value in entries:
+                key = tuple(key)
+                values[key] = metric._add(values[key], value) if key in values else value
+
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render(merged[metric.name]))
+    return '\n'.join(lines) + '\n'
+
+def export_snapshots(directory: str, interval: float = SNAPSHOT_INTERVAL) -> threading.Thread:
+    """Write a snapshot every `interval` seconds from a daemon thread."""
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                write_snapshot(directory)
+            except OSError as e:
+                logging.warning(f"Could not write metrics snapshot: {e}")
+
+    thread = threading.Thread(target=run, name='metrics-snapshots', daemon=True)
+    thread.start()
+    return thread
+
+def rest_trace() -> aiohttp.TraceConfig:
+    """aiohttp tracing that counts every REST response, including retried 429s."""
+    async def on_request_end(session, context, params):
+        status = params.response.status
+        REST_REQUESTS.inc(method=params.method, status=status)
+        if status == 429:
+            REST_RATE_LIMITS.inc(scope=params.response.headers.get('X-RateLimit-Scope', 'unknown'))
+            hits = rate_limit_hits.get()
+            if hits is not None:
+                hits.append(float(params.response.headers.get('Retry-After', 0)))
+
+    async def on_request_exception(session, context, params):
+        REST_REQUESTS.inc(method=params.method, status='error')
+
+    trace = aiohttp.TraceConfig()
+    trace.on_request_end.append(on_request_end)
+    trace.on_request_exception.append(on_request_exception)
+    return trace
+
+async def monitor_loop_lag(interval: float = LOOP_LAG_INTERVAL) -> None:
+    """Sleep for `interval` forever and record how late each wake-up was."""
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        LOOP_LAG_SECONDS.observe(max(0.0, loop.time() - start - interval))
+
+async def _handle_scrape(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        # Any request gets the metrics; read the request head and ignore it
+        await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), timeout=5)
+        body = render().encode()
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+            b"Content-Length: " + str(len(body)).encode() + b"\r\n"
+            b"Connection: close\r\n\r\n" + body
+        )
+        await writer.drain()
+    except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+async def serve(port: int, host: str = '0.0.0.0') -> asyncio.AbstractServer:
+    """Serve the metrics over HTTP on a side port of the running event loop."""
+    server = await asyncio.start_server(_handle_scrape, host, port)
+    logging.info(f"Serving metrics on port {port}")
+    return server
@@ -1,10 +1,12 @@
-import asyncio
 import discord
 from discord.ui import Modal, TextInput
 from discord.ext import commands
 from typing import Any
 import logging
 from views import GiveawayView, ExitView
+from async_db import create_active_giveaway, delete_giveaway
+from entry_journal import journal
+from metrics import HANDLER_SECONDS, timed
 
 class GiveawayModal(discord.ui.Modal, title="Create a Giveaway"):
     Title = discord.ui.TextInput(
@@ -50,10 +52,12 @@ class GiveawayModal(discord.ui.Modal, title="Create a Giveaway"):
         self.host_mention = host_mention
         self.ctx = ctx
         self.bot = bot
-        self.giveaway_view = GiveawayView(self.bot, self.ctx)
-        self.exit_view = ExitView()
+        self.giveaway_view = GiveawayView(self.bot, self.ctx.author)
+        self.exit_view = ExitView(self.cancel_giveaway)
+        self.message = None
         super().__init__(timeout=timeout)
 
+    @timed(HANDLER_SECONDS, handler='giveaway_modal')
     async def on_submit(self, interaction: discord.Interaction):
         """Handle modal submission and create the giveaway."""
         # Validate image URL if provided
@@ -97,7 +101,14 @@ class GiveawayModal(discord.ui.Modal, title="Create a Giveaway"):
         
         # Get the message reference
         message = await interaction.original_response()
+        self.message = message
         self.giveaway_view.giveaway_message = message
+        # Older discord.py stores views sent in a modal response without a
+        # message ID, so every giveaway would share one "giveaway:enter" slot
+        self.bot.add_view(self.giveaway_view, message_id=message.id)
+        
+        # Persist live state so the giveaway survives a restart
+        await create_active_giveaway(str(message.id), self.giveaway_view.active_state())
         
         # Setup exit view
         self.exit_view.timeout = self.giveaway_view.duration_seconds
@@ -107,17 +118,16 @@ class GiveawayModal(discord.ui.Modal, title="Create a Giveaway"):
             view=self.exit_view
         )
         
-        # Start countdown
-        countdown_task = asyncio.create_task(self.giveaway_view.run_countdown())
-        
-        # Handle cancellation
-        await self.exit_view.wait()
-        if self.exit_view.value:  # User cancelled
-            if interaction.user.id == self.ctx.author.id:
-                await message.delete()
-                await self.giveaway_view.stop_giveaway()
-                
-        await countdown_task
+        # Start countdown; cancellation is handled by the exit view's callback
+        self.giveaway_view.start_countdown()
+
+    async def cancel_giveaway(self):
+        """Delete the giveaway after the host pressed Cancel."""
+        await self.message.delete()
+        await self.giveaway_view.stop_giveaway()
+        # Write buffered joins first so a later flush cannot re-insert them
+        await journal.flush()
+        await delete_giveaway(str(self.message.id))
 
     async def on_error(self, interaction: discord.Interaction, error: Exception) -> None:
         """Handle modal errors."""
@@ -0,0 +1,90 @@
+import os
+import asyncio
+import logging
+from typing import Callable, Iterable
+
+import discord
+from discord.ext import commands
+
+class NotificationDispatcher:
+    """
+    Sends winner DMs concurrently with a bounded number in flight.
+
+    Users are taken from the bot's cache and only fetched on a miss. A send
+    that hits a rate limit or a transient server error is retried with
+    exponential backoff; closed DMs and unknown users fail immediately. Every
+    recipient's outcome is recorded so one failure never aborts the rest.
+    """
+
+    def __init__(self, concurrency: int = None, max_retries: int = 3, backoff: float = 1.0):
+        """
+        Initialize the dispatcher.
+
+        Args:
+            concurrency: Maximum DMs in flight (defaults to NOTIFY_CONCURRENCY or 5)
+            max_retries: Retries per recipient on rate limits and 5xx errors
+            backoff: Initial retry delay in seconds, doubled on each retry
+        """
+        self.concurrency = concurrency or int(os.getenv('NOTIFY_CONCURRENCY', '5'))
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._tasks = set()
+
+    async def send(self, bot: commands.Bot, user_ids: Iterable[int],
+                   build_embed: Callable[[discord.User], discord.Embed]) -> dict[int, str]:
+        """
+        DM every user and wait for all sends to finish.
+
+        Args:
+            bot: The bot instance
+            user_ids: Recipients
+            build_embed: Builds the embed for one recipient
+
+        Returns:
+            Dictionary mapping each failed user ID to the failure reason
+        """
+        user_ids = [int(user_id) for user_id in user_ids]
+        results = await asyncio.gather(*(self._send_one(bot, user_id, build_embed) for user_id in user_ids))
+        failures = {user_id: reason for user_id, reason in zip(user_ids, results) if reason}
+        if failures:
+            logging.warning(f"Could not notify {len(failures)}/{len(user_ids)} users: {failures}")
+        return failures
+
+    def dispatch(self, bot: commands.Bot, user_ids: Iterable[int],
+                 build_embed: Callable[[discord.User], discord.Embed]) -> asyncio.Task:
+        """Run `send` in the background so callers do not wait on the fan-out."""
+        task = asyncio.create_task(self.send(bot, user_ids, build_embed))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _send_one(self, bot: commands.Bot, user_id: int,
+                        build_embed: Callable[[discord.User], discord.Embed]) -> str | None:
+        """Send one DM, returning None on success or the failure reason."""
+        async with self._semaphore:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    user = bot.get_user(user_id) or await bot.fetch_user(user_id)
+                    await user.send(embed=build_embed(user))
+                    return None
+                except discord.Forbidden:
+                    return "DMs closed"
+                except discord.NotFound:
+                    return "unknown user"
+                except discord.RateLimited as e:
+                    delay = max(e.retry_after, self.backoff * 2 ** attempt)
+                    reason = "rate limited"
+                except discord.HTTPException as e:
+                    if e.status != 429 and e.status < 500:
+                        return f"HTTP {e.status}"
+                    delay = self.backoff * 2 ** attempt
+                    reason = f"HTTP {e.status}"
+                except Exception as e:
+                    return str(e)
+
+                if attempt < self.max_retries:
+                    await asyncio.sleep(delay)
+            return reason
+
+notifier = NotificationDispatcher()
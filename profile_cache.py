@@ -0,0 +1,102 @@
+import os
+import time
+import logging
+from collections import OrderedDict
+from typing import NamedTuple
+
+import discord
+from discord.ext import commands
+
+DEFAULT_AVATAR = "https://cdn.discordapp.com/embed/avatars/0.png"
+
+class Profile(NamedTuple):
+    id: str
+    username: str
+    display_name: str
+    discriminator: str
+    avatar: str
+    created_at: str
+    joined_at: str | None
+
+    @classmethod
+    def from_user(cls, user: discord.abc.User) -> 'Profile':
+        """Copy the stored profile fields out of a User or Member."""
+        joined_at = getattr(user, 'joined_at', None)
+        return cls(
+            str(user.id),
+            user.name,
+            user.display_name,
+            user.discriminator,
+            str(user.avatar.url) if user.avatar else DEFAULT_AVATAR,
+            str(user.created_at),
+            str(joined_at) if joined_at else None
+        )
+
+class ProfileCache:
+    """
+    Bounded LRU of the user profile fields saved with a giveaway.
+
+    With lean intents the bot keeps no member cache, so profiles are taken
+    from the interaction payloads users send anyway (entering a giveaway
+    carries their full member object) and only fetched over REST on a miss.
+    Entries expire after `ttl` seconds so renamed users are eventually
+    picked up again.
+    """
+
+    def __init__(self, max_entries: int = None, ttl: float = None):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Profiles kept before evicting the least recently
+                used (defaults to PROFILE_CACHE_SIZE or 100000)
+            ttl: Seconds a profile stays valid
+                (defaults to PROFILE_CACHE_TTL or 86400)
+        """
+        self.max_entries = max_entries or int(os.getenv('PROFILE_CACHE_SIZE', '100000'))
+        self.ttl = ttl if ttl is not None else float(os.getenv('PROFILE_CACHE_TTL', '86400'))
+        self._profiles = OrderedDict()
+
+    def remember(self, user: discord.abc.User) -> Profile:
+        """Store (or refresh) the profile of a user seen in an interaction."""
+        profile = Profile.from_user(user)
+        self._profiles[user.id] = (time.monotonic() + self.ttl, profile)
+        self._profiles.move_to_end(user.id)
+        if len(self._profiles) > self.max_entries:
+            self._profiles.popitem(last=False)
+        return profile
+
+    def get(self, user_id: int) -> Profile | None:
+        """Return a cached profile, or None if missing or expired."""
+        entry = self._profiles.get(user_id)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self._profiles[user_id]
+            return None
+        self._profiles.move_to_end(user_id)
+        return entry[1]
+
+    async def get_or_fetch(self, bot: commands.Bot, user_id: int) -> Profile | None:
+        """
+        Return a profile from the cache, the bot's user cache, or the API.
+
+        Returns:
+            Profile: The profile, or None if the user could not be fetched
+        """
+        profile = self.get(user_id)
+        if profile is not None:
+            return profile
+        user = bot.get_user(user_id)
+        if user is None:
+            try:
+                user = await bot.fetch_user(user_id)
+            except discord.HTTPException as e:
+                logging.warning(f"Could not fetch user {user_id}: {e}")
+                return None
+        return self.remember(user)
+
+    def __len__(self) -> int:
+        return len(self._profiles)
+
+profiles = ProfileCache()
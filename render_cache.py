@@ -0,0 +1,71 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+
+class CachedPage(NamedTuple):
+    version: int
+    etag: str
+    body: bytes
+
+class RenderCache:
+    """
+    In-process LRU of rendered giveaway pages bounded by total body size.
+
+    Each giveaway keeps at most one entry, tagged with the content version it
+    was rendered from; a lookup with a newer version misses, so bumping the
+    version in the database invalidates the page in every web worker without
+    any cross-process signalling.
+    """
+
+    def __init__(self, max_bytes: int = None):
+        """
+        Initialize the cache.
+
+        Args:
+            max_bytes: Total body bytes kept before evicting least recently
+                used pages (defaults to RENDER_CACHE_MAX_BYTES or 64 MiB)
+        """
+        self.max_bytes = max_bytes or int(os.getenv('RENDER_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+        self._pages = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, message_id: str, version: int) -> CachedPage | None:
+        """Return the cached page if it was rendered from this version."""
+        with self._lock:
+            page = self._pages.get(message_id)
+            if page is None or page.version != version:
+                return None
+            self._pages.move_to_end(message_id)
+            return page
+
+    def put(self, message_id: str, version: int, body: bytes) -> CachedPage:
+        """Store a rendered page, replacing any older version, and return it."""
+        page = CachedPage(version, hashlib.sha256(body).hexdigest()[:32], body)
+        if len(body) > self.max_bytes:
+            return page
+
+        with self._lock:
+            old = self._pages.pop(message_id, None)
+            if old is not None:
+                self._size -= len(old.body)
+            self._pages[message_id] = page
+            self._size += len(body)
+            while self._size > self.max_bytes:
+                _, evicted = self._pages.popitem(last=False)
+                self._size -= len(evicted.body)
+        return page
+
+    def invalidate(self, message_id: str) -> None:
+        """Drop a giveaway's page."""
+        with self._lock:
+            old = self._pages.pop(message_id, None)
+            if old is not None:
+                self._size -= len(old.body)
+
+    @property
+    def size(self) -> int:
+        """Total bytes currently cached."""
+        return self._size
@@ -0,0 +1,119 @@
+import os
+import time
+import heapq
+import asyncio
+import logging
+import itertools
+from typing import Any, Awaitable, Callable, Hashable
+
+class GiveawayScheduler:
+    """
+    Single owner of every giveaway deadline.
+
+    Deadlines live in one min-heap, so the runner only ever sleeps until the
+    earliest one instead of keeping a sleeping task per giveaway. Cancelling
+    or rescheduling marks the old heap entry dead and pushes a new one
+    (O(log n)); dead entries are skipped when they surface and the heap is
+    rebuilt once they outnumber live ones. Due callbacks are handed to a
+    fixed pool of workers, so a burst of giveaways ending in the same second
+    runs with bounded concurrency.
+    """
+
+    def __init__(self, workers: int = None):
+        """
+        Initialize the scheduler. Nothing runs until `start()` is called.
+
+        Args:
+            workers: Number of concurrent ending jobs
+                (defaults to SCHEDULER_WORKERS or 8)
+        """
+        self.worker_count = workers or int(os.getenv('SCHEDULER_WORKERS', '8'))
+        self._heap = []
+        self._entries = {}
+        self._counter = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._queue = asyncio.Queue()
+        self._tasks = []
+
+    def start(self) -> None:
+        """Start the runner and worker tasks on the running loop (idempotent)."""
+        if self._tasks:
+            return
+        self._tasks.append(asyncio.create_task(self._run()))
+        for _ in range(self.worker_count):
+            self._tasks.append(asyncio.create_task(self._work()))
+
+    def schedule(self, key: Hashable, deadline: float,
+                 callback: Callable[[], Awaitable[Any]]) -> None:
+        """
+        Schedule (or reschedule) a job.
+
+        Args:
+            key: Unique job key, e.g. the giveaway message ID
+            deadline: UNIX timestamp at which the job is due
+            callback: Coroutine function run once the deadline passes
+        """
+        self.cancel(key)
+        entry = [deadline, next(self._counter), key, callback]
+        self._entries[key] = entry
+        heapq.heappush(self._heap, entry)
+        if self._heap[0] is entry:
+            self._wakeup.set()
+
+    def cancel(self, key: Hashable) -> bool:
+        """
+        Cancel a pending job.
+
+        Args:
+            key: The job key passed to `schedule`
+
+        Returns:
+            bool: True if a pending job was cancelled
+        """
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        entry[-1] = None
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._heap = [e for e in self._heap if e[-1] is not None]
+            heapq.heapify(self._heap)
+        return True
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    async def _run(self):
+        """Sleep until the earliest deadline and hand due jobs to the workers."""
+        while True:
+            self._wakeup.clear()
+            heap = self._heap
+            while heap and heap[0][-1] is None:
+                heapq.heappop(heap)
+
+            if heap and heap[0][0] <= time.time():
+                _, _, key, callback = heapq.heappop(heap)
+                del self._entries[key]
+                self._queue.put_nowait((key, callback))
+                continue
+
+            timeout = heap[0][0] - time.time() if heap else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _work(self):
+        """Run due jobs one at a time."""
+        while True:
+            key, callback = await self._queue.get()
+            try:
+                await callback()
+            except Exception as e:
+                logging.error(f"Error running scheduled job {key}: {e}")
+            finally:
+                self._queue.task_done()
+
+scheduler = GiveawayScheduler()
@@ -0,0 +1,118 @@
+import os
+import gzip
+import logging
+import argparse
+import tempfile
+import datetime
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from db_operations import get_giveaway_summary, iter_giveaways
+from logging_setup import setup_logging
+
+EXPORT_DIR = os.getenv('STATIC_EXPORT_DIR', './Database/pages')
+ENTRANTS_PAGE_SIZE = int(os.getenv('ENTRANTS_PAGE_SIZE', '100'))
+
+_env = Environment(
+    loader=FileSystemLoader(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')),
+    autoescape=select_autoescape()
+)
+
+def summary_context(giveaway: dict, message_id: str) -> dict:
+    """Build the giveaway.html context from a get_giveaway_summary result."""
+    seconds = giveaway['Time']
+    if seconds < 60:
+        duration = f"{seconds} seconds"
+    elif seconds < 3600:
+        duration = f"{seconds//60} minutes"
+    elif seconds < 86400:
+        duration = f"{seconds//3600} hours"
+    else:
+        duration = f"{seconds//86400} days"
+
+    data = {
+        'title': giveaway['Title'],
+        'host': giveaway['Hoster'],
+        'duration': duration,
+        'description': giveaway['Description'],
+        'winner_count': len(giveaway['Winners']),
+        'entries': giveaway['EntrantCount'],
+        'participants': giveaway['EntrantCount'],
+        'winners': giveaway['Winners']
+    }
+
+    rerolls = [{
+        'user': reroll['user'],
+        'rerolled_at': datetime.datetime.fromtimestamp(
+            reroll['rerolled_at'], datetime.timezone.utc
+        ).strftime('%Y-%m-%d %H:%M UTC')
+    } for reroll in giveaway['Rerolls']]
+
+    return {
+        'giveaway': data,
+        'winners': giveaway['Winners'],
+        'rerolls': rerolls,
+        'entrants': giveaway['Entrants'],
+        'next_cursor': giveaway['NextCursor'],
+        'entrants_url': f"/api/{message_id}/entrants"
+    }
+
+def page_path(message_id: str, compressed: bool = False) -> str:
+    """Path of a giveaway's exported page."""
+    return os.path.join(EXPORT_DIR, f"{message_id}.html" + (".gz" if compressed else ""))
+
+def _write_atomic(path: str, body: bytes) -> None:
+    """Write a file so readers only ever see the old or the complete new content."""
+    fd, tmp_path = tempfile.mkstemp(dir=EXPORT_DIR, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(body)
+        # mkstemp creates 0600; static servers running as another user need to read it
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def export_giveaway(message_id: str) -> str | None:
+    """
+    Render an ended giveaway's summary page to disk with a gzipped copy.
+
+    Args:
+        message_id: The Discord message ID of the giveaway
+
+    Returns:
+        str: Path of the written HTML file, or None if the giveaway is
+            missing, still running, or could not be written
+    """
+    giveaway = get_giveaway_summary(message_id, ENTRANTS_PAGE_SIZE)
+    if giveaway is None or giveaway['Status'] != 'ended':
+        return None
+
+    body = _env.get_template('giveaway.html').render(**summary_context(giveaway, message_id)).encode()
+    try:
+        os.makedirs(EXPORT_DIR, exist_ok=True)
+        _write_atomic(page_path(message_id, compressed=True), gzip.compress(body, compresslevel=9, mtime=0))
+        _write_atomic(page_path(message_id), body)
+    except OSError as e:
+        logging.error(f"Error exporting giveaway {message_id}: {e}")
+        return None
+    return page_path(message_id)
+
+def export_all() -> int:
+    """Export every ended giveaway in the database, returning the page count."""
+    exported = 0
+    for giveaway in iter_giveaways(status='ended', columns=['message_id']):
+        if export_giveaway(giveaway['message_id']):
+            exported += 1
+    return exported
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Pre-render ended giveaway summary pages.")
+    parser.add_argument('message_ids', nargs='*', help="Giveaways to export")
+    parser.add_argument('--all', action='store_true', help="Backfill every giveaway in the database")
+    args = parser.parse_args()
+    setup_logging()
+
+    if args.all:
+        print(f"Exported {export_all()} pages to {EXPORT_DIR}")
+    for message_id in args.message_ids:
+        print(export_giveaway(message_id) or f"Skipped {message_id}")
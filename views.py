@@ -1,22 +1,45 @@
 import discord
-from discord import Interaction
 from discord.ui import Item, View, Button
 from discord.ext import commands
-from typing import Any
+from typing import Any, Awaitable, Callable
 import asyncio
 import logging
-import random
 import time as time_module
 import datetime
-from db_operations import save_giveaway_to_db
+from async_db import finalize_giveaway, delete_giveaway, get_active_giveaways, schedule_export
+from entrants import EntrantRegistry, entry_weight
+from embed_updater import EmbedUpdater
+from entry_journal import journal
+from scheduler import scheduler
+from notifications import notifier
+from message_handle import MessageHandle
+from profile_cache import profiles
+from metrics import Gauge, HANDLER_SECONDS, timed
 import os
 
+LEAVE_CONFIRM_TIMEOUT = 299
+
+# Giveaways counting down in this process, by message ID
+active_giveaways = {}
+
+Gauge('giftmaster_active_giveaways', "Giveaways counting down in this process",
+      func=lambda: len(active_giveaways))
+Gauge('giftmaster_live_entrants', "Entrants across the giveaways counting down in this process",
+      func=lambda: sum(len(view.participants) for view in list(active_giveaways.values())))
+
 class ExitView(discord.ui.View):
     """View containing a button to cancel a giveaway."""
     
-    def __init__(self):
+    def __init__(self, on_cancel: Callable[[], Awaitable[Any]] = None):
+        """
+        Initialize the exit view.
+        
+        Args:
+            on_cancel: Coroutine function called when the host cancels
+        """
         super().__init__()
         self.value = None
+        self.on_cancel = on_cancel
     
     @discord.ui.button(label="Cancel", style=discord.ButtonStyle.red)
     async def cancel_giveaway(self, interaction: discord.Interaction, button: discord.Button):
@@ -27,22 +50,57 @@ class ExitView(discord.ui.View):
         )
         self.value = True
         self.stop()
+        if self.on_cancel is not None:
+            await self.on_cancel()
 
-class LeaveGiveawayView(discord.ui.View):
-    """View allowing users to leave a giveaway."""
-    
-    def __init__(self, timeout=False):
-        super().__init__(timeout=timeout)
-        self.user_responses = {}  
-        self.timeout_trackers = {}  
-    
-    @discord.ui.button(label="Leave Giveaway", style=discord.ButtonStyle.red)
-    async def leave_giveaway(self, interaction: discord.Interaction, button: discord.Button):
+class LeaveGiveawayButton(discord.ui.DynamicItem[Button], template=r'giveaway:leave:(?P<message_id>[0-9]+)'):
+    """
+    Button allowing users to leave a giveaway.
+
+    The custom_id carries the giveaway's message ID, so the button keeps no
+    state and nothing is registered per prompt: the one registration made
+    by bot.add_dynamic_items serves every prompt, and the confirmation
+    window lives in the giveaway's pending leaves.
+    """
+
+    def __init__(self, message_id: int):
+        """
+        Initialize the leave button.
+
+        Args:
+            message_id: ID of the giveaway message the prompt belongs to
+        """
+        super().__init__(discord.ui.Button(
+            label="Leave Giveaway",
+            style=discord.ButtonStyle.red,
+            custom_id=f"giveaway:leave:{message_id}"
+        ))
+        self.message_id = message_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: Button, match) -> 'LeaveGiveawayButton':
+        return cls(int(match['message_id']))
+
+    @classmethod
+    def prompt_view(cls, message_id: int) -> View:
+        """
+        A view holding the button, to send with an ephemeral prompt.
+
+        The view is stopped before it is sent so discord.py neither stores
+        it nor starts a timeout task for it; clicks are routed to the
+        button by its custom_id alone.
+        """
+        view = View(timeout=None)
+        view.add_item(cls(message_id))
+        view.stop()
+        return view
+
+    @timed(HANDLER_SECONDS, handler='leave_giveaway')
+    async def callback(self, interaction: discord.Interaction):
         """Handle user leaving a giveaway."""
-        user_id = interaction.user.id
-        
-        if user_id in self.timeout_trackers:
-            self.user_responses[str(user_id)] = 1
+        giveaway = active_giveaways.get(self.message_id)
+
+        if giveaway is not None and giveaway.confirm_leave(interaction.user.id):
             await interaction.response.edit_message(
                 content="You have successfully left the giveaway! ✅",
                 view=None
@@ -52,59 +110,28 @@ class LeaveGiveawayView(discord.ui.View):
                 content="Timed out. Please try again ❌",
                 view=None
             )
-    
-    async def wait_for_response(self, user_id: int) -> bool:
-        """
-        Wait for user response with timeout.
-        
-        Args:
-            user_id: The Discord user ID to wait for
-            
-        Returns:
-            bool: True if user left, False if timed out
-        """
-        if user_id in self.timeout_trackers:
-            self.timeout_trackers[user_id] = 299
-            return
-        
-        self.timeout_trackers[user_id] = 299
-
-        while True:
-            if self.user_responses.get(str(user_id)) == 1:
-                del self.timeout_trackers[user_id]
-                return True
-                
-            if self.timeout_trackers[user_id] == 0:
-                del self.timeout_trackers[user_id]
-                return False
-                
-            self.timeout_trackers[user_id] -= 1
-            await asyncio.sleep(1)
-
-    async def on_error(self, interaction: Interaction, error: Exception, item: Item[Any]) -> None:
-        """Handle errors in the view."""
-        logging.error(f"Error in LeaveGiveawayView: {error}")
 
 class GiveawayView(discord.ui.View):
     """View for managing a giveaway including entry, countdown and winner selection."""
     
-    def __init__(self, bot: commands.Bot, ctx: commands.Context, timeout=False):
+    def __init__(self, bot: commands.Bot, host: discord.abc.User | None, timeout=None):
         """
         Initialize a new giveaway view.
         
         Args:
             bot: The bot instance
-            ctx: The command context
+            host: The hosting user, or None until resolved after a restart
             timeout: Whether the view should timeout automatically
+                (must stay None for the view to be persistent)
         """
         super().__init__(timeout=timeout)
         self.bot = bot
-        self.ctx = ctx
+        self.host = host
+        self.host_id = host.id if host else None
         self.duration_seconds = None  
-        self.is_active = None  
-        self.participants = []  
+        self.is_active = True  
+        self.participants = EntrantRegistry()  
         self.entry_count = 0  
-        self.countdown_task = None  
         self.winners = []  
         self.end_timestamp = None  
         self.giveaway_message = None  
@@ -115,7 +142,17 @@ class GiveawayView(discord.ui.View):
         self.description = None  
         self.host_mention = None  
         self.image_url = None  
-        self.leave_view = LeaveGiveawayView()  
+        # Open leave confirmations: user ID -> timer handle that expires it
+        self.pending_leaves = {}
+        self.embed_updater = EmbedUpdater(self.update_giveaway_message)
+        self._message_handle = None
+
+    @property
+    def message_handle(self) -> MessageHandle:
+        """Fetch-free handle on the giveaway message, built on first use."""
+        if self._message_handle is None:
+            self._message_handle = MessageHandle.for_message(self.bot, self.giveaway_message)
+        return self._message_handle
 
     def setup_giveaway(self, host: str, title: str, winner_count: str, 
                      duration_str: str, description: str, image_url: str) -> None:
@@ -140,6 +177,61 @@ class GiveawayView(discord.ui.View):
         now = datetime.datetime.now()
         self.creation_time = now.strftime('%A %d %b %Y %I:%M %p')
 
+    def active_state(self) -> dict:
+        """Return the data needed to resume this giveaway after a restart."""
+        channel = self.giveaway_message.channel
+        return {
+            "member": self.host_mention,
+            "host_id": str(self.host_id),
+            "guild_id": str(channel.guild.id) if getattr(channel, 'guild', None) else None,
+            "channel_id": str(channel.id),
+            "Title": self.title,
+            "Winner": self.winner_count,
+            "Time": self.duration_seconds,
+            "Description": self.description,
+            "image_url": self.image_url,
+            "end_timestamp": self.end_timestamp
+        }
+
+    @classmethod
+    def restore(cls, bot: commands.Bot, data: dict) -> 'GiveawayView':
+        """
+        Rebuild an active giveaway from its persisted state.
+        
+        Args:
+            bot: The bot instance
+            data: One entry returned by get_active_giveaways
+            
+        Returns:
+            GiveawayView: The view, ready to be registered with bot.add_view
+        """
+        host_id = int(data["host_id"])
+        view = cls(bot, bot.get_user(host_id))
+        view.host_id = host_id
+        view.setup_giveaway(
+            host=data["member"],
+            title=data["Title"],
+            winner_count=data["Winner"],
+            duration_str="",
+            description=data["Description"],
+            image_url=data["image_url"]
+        )
+        view.duration_seconds = data["Time"]
+        view.end_timestamp = data["end_timestamp"]
+        view.participants = EntrantRegistry((int(user_id) for user_id in data["Entrants"]), data["Weights"])
+        view.entry_count = len(view.participants)
+        
+        guild_id = int(data["guild_id"]) if data["guild_id"] else None
+        channel = bot.get_partial_messageable(int(data["channel_id"]), guild_id=guild_id)
+        view.giveaway_message = channel.get_partial_message(int(data["message_id"]))
+        return view
+
+    async def ensure_host(self) -> discord.abc.User:
+        """Resolve the host user, fetching it once if it is not cached."""
+        if self.host is None:
+            self.host = self.bot.get_user(self.host_id) or await self.bot.fetch_user(self.host_id)
+        return self.host
+
     def parse_duration(self) -> bool:
         """
         Parse duration string into seconds and set end timestamp.
@@ -172,7 +264,7 @@ class GiveawayView(discord.ui.View):
     def create_embed(self) -> discord.Embed:
         """Create the giveaway embed with current information."""
         try:
-            avatar = self.ctx.author.avatar.url
+            avatar = self.host.avatar.url
         except AttributeError:
             avatar = "https://cdn.discordapp.com/embed/avatars/0.png"
             
@@ -200,102 +292,179 @@ class GiveawayView(discord.ui.View):
             
         return embed
 
-    async def update_giveaway_message(self, channel: discord.TextChannel):
-        """Update the giveaway message with current participant count."""
-        try:
-            msg = await channel.fetch_message(self.giveaway_message.id)
-            await msg.edit(embed=self.create_embed())
-        except Exception as e:
-            logging.error(f"Error updating giveaway message: {e}")
+    async def update_giveaway_message(self):
+        """
+        Update the giveaway message with current participant count.
+
+        Called by the embed updater at most once per coalescing window;
+        errors propagate so it can back off on rate limits.
+        """
+        await self.ensure_host()
+        await self.message_handle.edit(embed=self.create_embed())
 
-    @discord.ui.button(label="", style=discord.ButtonStyle.blurple, emoji="🎉")
+    @discord.ui.button(label="", style=discord.ButtonStyle.blurple, emoji="🎉", custom_id="giveaway:enter")
+    @timed(HANDLER_SECONDS, handler='enter_giveaway')
     async def enter_giveaway(self, interaction: discord.Interaction, button: discord.Button):
         """Handle user entering the giveaway."""
         user_id = interaction.user.id
         
+        # Winners are being drawn; a late entry would land in an ended giveaway
+        if not self.is_active:
+            await interaction.response.send_message(content="This giveaway has ended!", ephemeral=True)
+            return
+        
         if user_id in self.participants:
-            self.leave_view.user_responses[str(user_id)] = 0
+            self.prompt_leave(user_id)
             await interaction.response.send_message(
                 content="You have already entered this giveaway!",
                 ephemeral=True, 
-                view=self.leave_view
+                view=LeaveGiveawayButton.prompt_view(self.giveaway_message.id)
             )
-            
-            did_leave = await self.leave_view.wait_for_response(user_id)
-            if did_leave and user_id in self.participants:
-                self.entry_count -= 1
-                self.participants.remove(user_id)
-                await self.update_giveaway_message(interaction.channel)
             return
                 
-        self.participants.append(user_id)
+        weight = entry_weight(interaction.user)
+        profiles.remember(interaction.user)
+        self.participants.add(user_id, weight)
         self.entry_count += 1
-        await interaction.response.edit_message(embed=self.create_embed())
+        journal.record_join(self.giveaway_message.id, user_id, weight)
+        await interaction.response.defer()
+        self.embed_updater.request()
 
-    async def run_countdown(self):
-        """Run the giveaway countdown and select winners when time expires."""
-        self.countdown_task = asyncio.create_task(asyncio.sleep(self.duration_seconds))
-        await self.countdown_task
+    def prompt_leave(self, user_id: int) -> None:
+        """
+        Open (or restart) a leave confirmation window for a user.
+
+        Nothing runs while the user decides; the window is a timer handle
+        that drops the entry when it expires.
+
+        Args:
+            user_id: The Discord user ID being asked to confirm
+        """
+        handle = self.pending_leaves.pop(user_id, None)
+        if handle is not None:
+            handle.cancel()
+
+        self.pending_leaves[user_id] = asyncio.get_running_loop().call_later(
+            LEAVE_CONFIRM_TIMEOUT, self.pending_leaves.pop, user_id, None
+        )
+
+    def confirm_leave(self, user_id: int) -> bool:
+        """
+        Remove a user whose leave confirmation is still open.
+
+        Returns:
+            bool: False if the confirmation expired or was never opened
+        """
+        handle = self.pending_leaves.pop(user_id, None)
+        if handle is None:
+            return False
+        handle.cancel()
+        self.remove_participant(user_id)
+        return True
+
+    def cancel_leave_prompts(self) -> None:
+        """Expire every open leave confirmation."""
+        for handle in self.pending_leaves.values():
+            handle.cancel()
+        self.pending_leaves.clear()
+
+    def remove_participant(self, user_id: int) -> None:
+        """
+        Remove a user who confirmed leaving the giveaway.
         
-        try:
-            channel = self.bot.get_channel(self.giveaway_message.channel.id)
-            await channel.fetch_message(self.giveaway_message.id)
-        except discord.NotFound:
-            logging.error("Giveaway message was deleted")
-            self.is_active = False
-            self.stop()
-            self.leave_view.stop()
+        Args:
+            user_id: The Discord user ID leaving
+        """
+        if not self.is_active:
             return
+        if self.participants.discard(user_id):
+            self.entry_count -= 1
+            journal.record_leave(self.giveaway_message.id, user_id)
+            self.embed_updater.request()
+
+    def start_countdown(self) -> None:
+        """Hand the giveaway deadline to the central scheduler."""
+        active_giveaways[self.giveaway_message.id] = self
+        scheduler.schedule(self.giveaway_message.id, self.end_timestamp, self.finish_giveaway)
+
+    async def finish_giveaway(self):
+        """
+        Select winners once the deadline passes (run by the scheduler).
+
+        The ended embed is edited in before anything is announced, so a
+        deleted giveaway message is detected by that edit failing rather
+        than by fetching the message first; the saved result is then
+        dropped again.
+        """
+        # Stop taking joins and leaves before the draw; everything recorded
+        # so far is flushed by save_giveaway_data / end_giveaway
+        self.is_active = False
+        self.cancel_leave_prompts()
+        self.embed_updater.cancel()
             
         if self.entry_count == 0:
-            await self.giveaway_message.channel.send(
-                f"{self.host_mention} No one entered your giveaway"
-            )
             await self.end_giveaway()
             return
             
         winner_count = min(int(self.winner_count), self.entry_count)
-        winner_ids = random.sample(self.participants, winner_count)
+        winner_ids = self.participants.sample(winner_count)
         self.winners = [f"<@{winner_id}>" for winner_id in winner_ids]
         
-        self.save_giveaway_data()
+        await self.save_giveaway_data()
+        if not await self.update_ended_giveaway():
+            logging.error("Giveaway message was deleted")
+            await journal.flush()
+            await delete_giveaway(str(self.giveaway_message.id))
+            self.close()
+            return
+        
         await self.announce_winners(winner_ids)
-        await self.update_ended_giveaway()
         await self.send_host_summary()
-        
-        self.is_active = False
-        self.stop()
-        self.leave_view.stop()
+        self.close()
+        schedule_export(str(self.giveaway_message.id))
 
     async def end_giveaway(self):
         """Clean up when giveaway ends with no participants."""
-        channel = self.bot.get_channel(self.giveaway_message.channel.id)
-        msg = await channel.fetch_message(self.giveaway_message.id)
-        
         self.clear_items()
-        await msg.edit(embed=self.create_embed(), view=self)
-        
+        await self.ensure_host()
+        if await self.message_handle.edit(embed=self.create_embed(), view=self):
+            await self.giveaway_message.channel.send(
+                f"{self.host_mention} No one entered your giveaway"
+            )
+        # Buffered leaves would otherwise re-insert rows after the delete
+        await journal.flush()
+        await delete_giveaway(str(self.giveaway_message.id))
+        self.close()
+
+    def close(self) -> None:
+        """Stop listening for interactions and log the REST calls the giveaway made."""
         self.is_active = False
+        active_giveaways.pop(self.giveaway_message.id, None)
         self.stop()
-        self.leave_view.stop()
+        self.cancel_leave_prompts()
+        handle = self.message_handle
+        logging.info(
+            f"Giveaway {self.giveaway_message.id} closed after {handle.total_calls} "
+            f"message REST calls ({dict(handle.rest_calls)})"
+        )
+
+    async def save_giveaway_data(self):
+        """
+        Save giveaway data to database once pending journal entries are flushed.
 
-    def save_giveaway_data(self):
-        """Save giveaway data to database."""
+        Profiles come from the profile cache, which entering filled in. Only
+        winners missing from it are fetched; other misses (e.g. entrants from
+        before a restart) are saved as bare IDs and keep their stored profile.
+        """
+        await journal.flush()
+        
+        for mention in self.winners:
+            await profiles.get_or_fetch(self.bot, int(mention.strip('<@!>')))
+        
         entrants_data = []
         for user_id in self.participants:
-            user = self.bot.get_user(user_id)
-            if user:
-                entrants_data.append({
-                    "id": str(user.id),
-                    "username": user.name,
-                    "display_name": user.display_name,
-                    "discriminator": user.discriminator,
-                    "avatar": str(user.avatar.url) if user.avatar else "https://cdn.discordapp.com/embed/avatars/0.png",
-                    "created_at": str(user.created_at),
-                    "joined_at": str(user.joined_at) if hasattr(user, 'joined_at') else None
-                })
-            else:
-                entrants_data.append(str(user_id))  
+            profile = profiles.get(user_id)
+            entrants_data.append(profile._asdict() if profile else str(user_id))
         
         giveaway_data = {
             "member": self.host_mention,
@@ -308,10 +477,10 @@ class GiveawayView(discord.ui.View):
             "Winners": self.winners
         }
         
-        save_giveaway_to_db(str(self.giveaway_message.id), giveaway_data)
+        await finalize_giveaway(str(self.giveaway_message.id), giveaway_data)
 
     async def announce_winners(self, winner_ids: list[int]):
-        """Announce winners in channel and DM them.
+        """Announce winners in channel and DM them in the background.
         
         Args:
             winner_ids: List of winner user IDs
@@ -321,8 +490,9 @@ class GiveawayView(discord.ui.View):
             f"**You won the {self.title}** 🎊🎊"
         )
         
-        for winner_id in winner_ids:
-            user = await self.bot.fetch_user(winner_id)
+        host = await self.ensure_host()
+        
+        def build_embed(user: discord.User) -> discord.Embed:
             embed = discord.Embed(
                 title="🏆 Congratulations! You Won! 🏆",
                 description=f"Hey {user.mention}, you won the **{self.title}** giveaway!",
@@ -339,17 +509,22 @@ class GiveawayView(discord.ui.View):
                 inline=False
             )
             embed.set_thumbnail(url="https://cdn.discordapp.com/emojis/715914936945147914.gif?v=1") 
-            embed.set_footer(text=f"Hosted by {self.ctx.author.display_name}", icon_url=self.ctx.author.avatar.url if self.ctx.author.avatar else None)
+            embed.set_footer(text=f"Hosted by {host.display_name}", icon_url=host.avatar.url if host.avatar else None)
             embed.timestamp = datetime.datetime.now()
-            await user.send(embed=embed)
+            return embed
+        
+        notifier.dispatch(self.bot, winner_ids, build_embed)
+
+    async def update_ended_giveaway(self) -> bool:
+        """
+        Update the giveaway message after it ends.
 
-    async def update_ended_giveaway(self):
-        """Update the giveaway message after it ends."""
+        Returns:
+            bool: False if the giveaway message was deleted
+        """
         self.winner_count = " ".join(self.winners)
         self.clear_items()
         
-        channel = self.bot.get_channel(self.giveaway_message.channel.id)
-        msg = await channel.fetch_message(self.giveaway_message.id)
         embed = self.create_embed()
         summary_button = Button(
             label="Giveaway Summary",
@@ -358,12 +533,20 @@ class GiveawayView(discord.ui.View):
         )
         self.add_item(summary_button)
              
-        await msg.edit(embed=embed, view=self)
+        return await self.message_handle.edit(embed=embed, view=self)
 
     async def send_host_summary(self):
         """Send a summary DM to the giveaway host."""
-        channel = await self.ctx.author.create_dm()
-        entrants = [f"<@{user_id}>" for user_id in self.participants]
+        host = await self.ensure_host()
+        channel = await host.create_dm()
+        entrants = []
+        entrants_length = 0
+        for user_id in self.participants:
+            mention = f"<@{user_id}>"
+            entrants.append(mention)
+            entrants_length += len(mention) + 1
+            if entrants_length > 1001:
+                break
         entrants_str = ' '.join(entrants)
         
         
@@ -397,13 +580,44 @@ class GiveawayView(discord.ui.View):
     async def stop_giveaway(self):
         """Stop the giveaway and clean up resources."""
         self.is_active = False
+        active_giveaways.pop(self.giveaway_message.id, None)
         
-        if self.countdown_task and not self.countdown_task.done():
-            self.countdown_task.cancel()
-            
-        self.leave_view.stop()
+        scheduler.cancel(self.giveaway_message.id)
+        self.embed_updater.cancel()
+        self.cancel_leave_prompts()
         self.stop()
 
     async def on_error(self, interaction: discord.Interaction, error: Exception, item: Item[Any]) -> None:
         """Handle errors in the giveaway view."""
         logging.error(f"Error in GiveawayView: {error}")
+
+def owns_guild(bot: commands.Bot, guild_id: str | None) -> bool:
+    """
+    Whether this process runs the shard of a guild, and so owns its giveaways.
+
+    Giveaways outside a guild belong to shard 0, like DMs.
+    """
+    shard_ids = getattr(bot, 'shard_ids', None)
+    if shard_ids is None:
+        return True
+    shard_id = (int(guild_id) >> 22) % (bot.shard_count or 1) if guild_id else 0
+    return shard_id in shard_ids
+
+async def restore_active_giveaways(bot: commands.Bot) -> int:
+    """
+    Re-register every active giveaway as a persistent view and resume its countdown.
+    
+    Args:
+        bot: The bot instance
+        
+    Returns:
+        int: Number of giveaways restored
+    """
+    active = [data for data in await get_active_giveaways() if owns_guild(bot, data["guild_id"])]
+    for data in active:
+        view = GiveawayView.restore(bot, data)
+        bot.add_view(view, message_id=view.giveaway_message.id)
+        view.start_countdown()
+    
+    logging.info(f"Restored {len(active)} active giveaways")
+    return len(active)